@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
+from mrinversion.kernel.cache import KernelCache  # NOQA
+from mrinversion.kernel.kronecker import KroneckerKernel  # NOQA
 from mrinversion.kernel.relaxation import T1  # NOQA
 from mrinversion.kernel.relaxation import T2  # NOQA
+from mrinversion.kernel.sidebands import SidebandTable  # NOQA
@@ -4,6 +4,7 @@ from copy import deepcopy
 import csdmpy as cp
 import numpy as np
 
+from .cache import KernelCache
 from .utils import _x_y_to_zeta_eta_distribution
 
 __dimension_list__ = (cp.Dimension, cp.LinearDimension, cp.MonotonicDimension)
@@ -53,21 +54,41 @@ class BaseModel:
 
     def _averaged_kernel(self, amp, supersampling):
         """Return the kernel by averaging over the supersampled grid cells."""
-        shape = ()
+        K = self._supersampled_mean(amp, supersampling)
+        return self._normalized_kernel(K)
+
+    def _supersampled_mean(self, amp, supersampling, count=None):
+        """Return the amplitudes averaged over the supersampled grid cells, as an
+        array of shape (n_d, ..., n_1, n_0, kernel_count), where n_i is the count of
+        the i-th inverse dimension. When `amp` holds a subset of the rows of the
+        grid, `count` is the number of rows along the outermost inverse dimension,
+        n_d."""
         inverse_kernel_dimension = self.inverse_kernel_dimension
         if not isinstance(self.inverse_kernel_dimension, list):
             inverse_kernel_dimension = [self.inverse_kernel_dimension]
 
-        for item in inverse_kernel_dimension[::-1]:
-            shape += (item.count, supersampling)
+        counts = [item.count for item in inverse_kernel_dimension[::-1]]
+        if count is not None:
+            counts[0] = count
+
+        shape = ()
+        for item in counts:
+            shape += (item, supersampling)
         shape += (self.kernel_dimension.count,)
 
-        K = amp.reshape(shape)
+        K = np.asarray(amp).reshape(shape)
 
-        inv_len = len(inverse_kernel_dimension)
-        axes = tuple([2 * i + 1 for i in range(inv_len)])
-        K = K.mean(axis=axes)
+        axes = tuple([2 * i + 1 for i in range(len(counts))])
+        return K.mean(axis=axes)
+
+    def _normalized_kernel(self, K):
+        """Return the normalized kernel of shape (kernel_count, inverse_size) from the
+        averaged amplitudes of shape (n_d, ..., n_1, n_0, kernel_count)."""
+        inverse_kernel_dimension = self.inverse_kernel_dimension
+        if not isinstance(self.inverse_kernel_dimension, list):
+            inverse_kernel_dimension = [self.inverse_kernel_dimension]
 
+        inv_len = len(inverse_kernel_dimension)
         section = [*[0 for i in range(inv_len)], slice(None, None, None)]
         K /= K[tuple(section)].sum()
 
@@ -144,6 +165,31 @@ class LineShape(BaseModel):
         )
         return zeta, eta
 
+    def _cache_key(self, supersampling, **kwargs):
+        """Return the cache key of the kernel generated with the given supersampling
+        factor and keyword arguments."""
+        inverse_dimension = [
+            _dimension_signature(item) for item in self.inverse_kernel_dimension
+        ]
+        return KernelCache.key(
+            self.method_args,
+            _dimension_signature(self.kernel_dimension),
+            inverse_dimension,
+            self.number_of_sidebands,
+            supersampling,
+            kwargs,
+        )
+
+
+def _dimension_signature(dimension):
+    """Return a json serializable description of the dimension coordinates."""
+    coordinates = dimension.coordinates
+    return {
+        "type": dimension.type,
+        "unit": str(coordinates.unit),
+        "coordinates": coordinates.value.tolist(),
+    }
+
 
 def _check_csdm_dimension(dimensions, dimension_id):
     if not isinstance(dimensions, (list, *__dimension_list__)):
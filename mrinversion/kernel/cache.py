@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+__default_directory__ = os.path.join(os.path.expanduser("~"), ".mrinversion", "kernels")
+
+
+class KernelCache:
+    r"""
+    A content-addressed on-disk cache of kernel matrices.
+
+    Every kernel is stored as a `.npy` file named after the hash of the parameters
+    used in generating the kernel, and is returned as a memory-mapped array. When
+    the total size of the cache exceeds `max_size`, the least recently used entries
+    are evicted.
+
+    Args
+    ----
+
+    directory: str
+        The path to the cache directory. The default is `~/.mrinversion/kernels`.
+    max_size: int
+        The maximum size of the cache in bytes. The default is 1 GB.
+
+    Example
+    -------
+
+    >>> from mrinversion.kernel import KernelCache
+    >>> cache = KernelCache(directory=tmp_dir, max_size=2 ** 20)  # doctest: +SKIP
+    >>> K = lineshape.kernel(supersampling=2, cache=cache)  # doctest: +SKIP
+    """
+
+    def __init__(self, directory=None, max_size=2 ** 30):
+        self.directory = __default_directory__ if directory is None else directory
+        self.max_size = int(max_size)
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*args):
+        """Return a hash key from the given json serializable arguments."""
+        content = json.dumps(args, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        """Return the path of the cache entry for the given key."""
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def load(self, key, mmap_mode="c"):
+        """Return the memory-mapped array for the given key, or None if the key is
+        not present in the cache.
+
+        Args:
+            key: The hash key of the entry.
+            mmap_mode: The memory-map mode. The default is `c` (copy-on-write).
+        """
+        filename = self.path(key)
+        if not os.path.isfile(filename):
+            return None
+
+        # update the modification time to mark the entry as recently used.
+        os.utime(filename)
+        return np.load(filename, mmap_mode=mmap_mode)
+
+    def store(self, key, array, mmap_mode="c"):
+        """Save the array to the cache under the given key and return the memory
+        mapped array.
+
+        Args:
+            key: The hash key of the entry.
+            array: The ndarray to store.
+            mmap_mode: The memory-map mode. The default is `c` (copy-on-write).
+        """
+        fd, temp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(temp, self.path(key))
+
+        self._evict(keep=key)
+        return np.load(self.path(key), mmap_mode=mmap_mode)
+
+    def keys(self):
+        """Return a list of keys in the cache, ordered from the least to the most
+        recently used."""
+        return [item["key"] for item in self._entries()]
+
+    def info(self):
+        """Return a dictionary with the directory, number of entries, total size,
+        and maximum size (in bytes) of the cache."""
+        entries = self._entries()
+        return {
+            "directory": self.directory,
+            "entries": len(entries),
+            "size": sum([item["size"] for item in entries]),
+            "max_size": self.max_size,
+        }
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        for item in self._entries():
+            os.remove(item["path"])
+
+    def __contains__(self, key):
+        return os.path.isfile(self.path(key))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def _entries(self):
+        """Return a list of cache entries sorted by the last access time."""
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".npy"):
+                continue
+            file_path = os.path.join(self.directory, filename)
+            stat = os.stat(file_path)
+            entries.append(
+                {
+                    "key": filename[:-4],
+                    "path": file_path,
+                    "size": stat.st_size,
+                    "time": stat.st_mtime,
+                }
+            )
+        return sorted(entries, key=lambda item: item["time"])
+
+    def _evict(self, keep=None):
+        """Remove the least recently used entries until the cache size is within
+        max_size. The entry with key `keep` is never removed."""
+        entries = self._entries()
+        size = sum([item["size"] for item in entries])
+        for item in entries:
+            if size <= self.max_size:
+                break
+            if item["key"] == keep:
+                continue
+            os.remove(item["path"])
+            size -= item["size"]
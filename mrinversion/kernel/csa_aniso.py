@@ -1,11 +1,26 @@
 # -*- coding: utf-8 -*-
 from copy import deepcopy
 
+import numpy as np
+from joblib import delayed
+from joblib import effective_n_jobs
+from joblib import Parallel
 from mrsimulator import Simulator
 from mrsimulator import SpinSystem
 from mrsimulator.methods import BlochDecaySpectrum
 
 from mrinversion.kernel.base import LineShape
+from mrinversion.kernel.cache import KernelCache
+from mrinversion.kernel.utils import _scaled_lineshapes_from_table
+
+__engines__ = ("exact", "scaled", "table")
+
+# The (eta, frequency) shape of the unit-anisotropy line-shape table used with the
+# `scaled` kernel engine.
+__scaled_table_shape__ = (201, 4096)
+
+# The approximate memory, in bytes, of a single-site SpinSystem object.
+__spin_system_size__ = 4096
 
 
 class ShieldingPALineshape(LineShape):
@@ -54,30 +69,66 @@ class ShieldingPALineshape(LineShape):
             rotor_frequency,
             number_of_sidebands,
         )
+        self._table = None
 
-    def kernel(self, supersampling=1):
+    def kernel(
+        self,
+        supersampling=1,
+        cache=None,
+        engine="exact",
+        table=None,
+        max_memory=None,
+        n_jobs=1,
+    ):
         """
         Return the NMR nuclear shielding anisotropic line-shape kernel.
 
         Args:
             supersampling: An integer. Each cell is supersampled by the factor
                     `supersampling` along every dimension.
+            cache: A :class:`~mrinversion.kernel.KernelCache` object. If provided,
+                    the kernel is loaded from the cache when a kernel with identical
+                    parameters was previously generated, otherwise, the generated
+                    kernel is added to the cache. The cached kernel is returned as
+                    a memory-mapped array. The default is None.
+            engine: A string literal specifying how the line-shapes are generated.
+                    The allowed literals are `exact`, `scaled`, and `table`. When
+                    `exact`, the line-shape of every supersampled grid cell is
+                    simulated with mrsimulator. When `scaled`, only a table of
+                    unit-anisotropy line-shapes over the asymmetry parameter is
+                    simulated, and the line-shape of every grid cell is evaluated by
+                    rescaling and bin-integrating the table. The `scaled` engine
+                    applies to the infinite spinning speed kernels, that is, when
+                    `number_of_sidebands` is one. When `table`, the sideband
+                    amplitudes are interpolated from the given sideband table.
+                    The default is `exact`.
+            table: A :class:`~mrinversion.kernel.SidebandTable` object. Required
+                    when the engine is `table`. The rotor frequency must be a multiple
+                    of the increment along the anisotropic dimension, such that the
+                    sidebands coincide with the dimension coordinates.
+            max_memory: The approximate upper limit, in bytes, of the memory used in
+                    generating the line-shapes. If provided, the rows of the inverse
+                    grid are generated in chunks, and every chunk is averaged into
+                    the kernel before generating the next chunk. The default is None,
+                    that is, all rows are generated at once.
+            n_jobs: The number of worker processes used in simulating the
+                    line-shapes with the `exact` engine. The sites are split into
+                    n_jobs shards, and the simulated shards are stitched back in order,
+                    such that the kernel is identical to the serial kernel. A value of
+                    -1 uses all processors. The default is 1.
         Returns:
             A numpy array containing the line-shape kernel.
         """
+        self._check_engine(engine, table)
+
         args_ = deepcopy(self.method_args)
         method = BlochDecaySpectrum.parse_dict_with_units(args_)
-        isotope = args_["channels"][0]
         zeta, eta = self._get_zeta_eta(supersampling)
+        larmor_frequency = _larmor_frequency(method)  # in MHz
 
         x_csdm = self.inverse_kernel_dimension[0]
         if x_csdm.coordinates.unit.physical_type == "frequency":
 
-            # larmor frequency from method.
-            B0 = method.spectral_dimensions[0].events[0].magnetic_flux_density  # in T
-            gamma = method.channels[0].gyromagnetic_ratio  # in MHz/T
-            larmor_frequency = -gamma * B0  # in MHz
-
             # convert zeta to ppm if given in frequency units.
             zeta /= larmor_frequency  # zeta in ppm
 
@@ -85,27 +136,199 @@ class ShieldingPALineshape(LineShape):
                 if dim_i.origin_offset.value == 0:
                     dim_i.origin_offset = f"{abs(larmor_frequency)} MHz"
 
-        spin_systems = [
-            SpinSystem(
-                sites=[dict(isotope=isotope, shielding_symmetric=dict(zeta=z, eta=e))]
-            )
-            for z, e in zip(zeta, eta)
-        ]
+        if cache is not None:
+            table_key = None if table is None else table.key
+            key = self._cache_key(supersampling, engine=engine, table=table_key)
+            K = cache.load(key)
+            if K is not None:
+                return K
 
         dim = method.spectral_dimensions[0]
         if dim.origin_offset == 0:
             dim.origin_offset = larmor_frequency * 1e6  # in Hz
 
-        sim = Simulator()
-        sim.config.number_of_sidebands = self.number_of_sidebands
-        sim.config.decompose_spectrum = "spin_system"
+        rows = self._rows_per_chunk(supersampling, max_memory)
+        size = zeta.size // self.inverse_kernel_dimension[1].count
+
+        K = []
+        for i in range(0, self.inverse_kernel_dimension[1].count, rows):
+            section = slice(i * size, (i + rows) * size)
+            amp = self._lineshapes(
+                method, zeta[section], eta[section], engine, table, n_jobs
+            )
+            count = amp.shape[0] // size
+            K.append(self._supersampled_mean(amp, supersampling, count))
+            del amp
+
+        K = self._normalized_kernel(np.concatenate(K, axis=0))
+
+        if cache is not None:
+            return cache.store(key, K)
+        return K
+
+    def _rows_per_chunk(self, supersampling, max_memory):
+        """Return the number of rows of the inverse grid generated at once within the
+        given memory limit."""
+        rows = self.inverse_kernel_dimension[1].count
+        if max_memory is None:
+            return rows
+
+        # memory of the line-shape amplitudes and the spin system objects per cell.
+        cell_size = 8 * self.kernel_dimension.count + __spin_system_size__
+        cells = self.inverse_kernel_dimension[0].count * supersampling ** 2
+        return int(min(max(max_memory // (cell_size * cells), 1), rows))
+
+    def _check_engine(self, engine, table):
+        """Check if the engine is valid for the kernel."""
+        if engine not in __engines__:
+            raise ValueError(
+                f"`{engine}` is an invalid engine. The allowed values are "
+                f"{__engines__}."
+            )
+        if engine == "scaled" and self.number_of_sidebands != 1:
+            raise ValueError(
+                "The `scaled` engine is only applicable to the infinite spinning "
+                "speed kernels, that is, when `number_of_sidebands` is one."
+            )
+        if engine == "table" and table is None:
+            raise ValueError("The `table` engine requires a SidebandTable object.")
+
+    def _lineshapes(self, method, zeta, eta, engine, table, n_jobs=1):
+        """Return the line-shapes of the sites with the given zeta (in ppm) and eta
+        values using the given engine. Only the unique (zeta, eta) pairs are
+        evaluated, and the line-shapes are scattered back to the sites with an index
+        map."""
+        pairs, index = np.unique(
+            np.column_stack((zeta, eta)), axis=0, return_inverse=True
+        )
+        zeta, eta = pairs[:, 0], pairs[:, 1]
+
+        if engine == "scaled":
+            amp = self._scaled_lineshapes(method, zeta, eta)
+        elif engine == "table":
+            amp = _table_lineshapes(method, zeta, eta, table)
+        else:
+            amp = self._simulate(method, zeta, eta, n_jobs)
+        return np.asarray(amp)[index.ravel()]
+
+    def _simulate(self, method, zeta, eta, n_jobs=1):
+        """Return the simulated line-shapes of the sites with the given zeta (in ppm)
+        and eta values as an array of shape (zeta.size, count). When n_jobs is not
+        one, the sites are simulated in shards over n_jobs worker processes."""
+        isotope = self.method_args["channels"][0]
+        args = (method, isotope, self.number_of_sidebands)
+
+        n_shards = min(effective_n_jobs(n_jobs), zeta.size)
+        if n_shards <= 1:
+            return _simulate_sites(*args, zeta, eta)
+
+        shards = zip(np.array_split(zeta, n_shards), np.array_split(eta, n_shards))
+        amp = Parallel(n_jobs=n_shards, backend="loky")(
+            delayed(_simulate_sites)(*args, z, e) for z, e in shards
+        )
+        return np.concatenate(amp, axis=0)
+
+    def _scaled_lineshapes(self, method, zeta, eta):
+        """Return the line-shapes of the sites with the given zeta (in ppm) and eta
+        values evaluated from the scaled unit-anisotropy line-shape table."""
+        cdf, table_edges = self._lineshape_table(method)
+
+        dim = method.spectral_dimensions[0]
+        increment = dim.spectral_width / dim.count
+        edges = dim.coordinates_Hz() - increment / 2.0
+        edges = np.append(edges, edges[-1] + increment)
+
+        return _scaled_lineshapes_from_table(cdf, table_edges, zeta, eta, edges)
+
+    def _lineshape_table(self, method):
+        """Return the cumulative line-shape table of sites with unit anisotropy (1 ppm)
+        over a uniform grid of eta values, along with the frequency bin edges (in Hz)
+        of the table. The table is simulated once and reused."""
+        key = KernelCache.key(self.method_args)
+        if self._table is not None and self._table[0] == key:
+            return self._table[1:]
+
+        n_eta, count = __scaled_table_shape__
+        # the unit anisotropy line-shapes are within a frequency window of
+        # +/- 1 ppm for all rotor angles at infinite spinning speed.
+        width = 2.0 * abs(_larmor_frequency(method))  # in Hz
+
+        args_ = deepcopy(self.method_args)
+        args_["spectral_dimensions"] = [
+            dict(count=count, spectral_width=f"{width} Hz", reference_offset="0 Hz")
+        ]
+        table_method = BlochDecaySpectrum.parse_dict_with_units(args_)
+
+        eta = np.linspace(0, 1, n_eta)
+        amp = np.asarray(self._simulate(table_method, np.ones(n_eta), eta))
+        amp /= amp.sum(axis=1)[:, np.newaxis]
+
+        cdf = np.zeros((n_eta, count + 1))
+        cdf[:, 1:] = np.cumsum(amp, axis=1)
+
+        increment = width / count
+        edges = table_method.spectral_dimensions[0].coordinates_Hz() - increment / 2.0
+        edges = np.append(edges, edges[-1] + increment)
+
+        self._table = (key, cdf, edges)
+        return cdf, edges
+
+
+def _simulate_sites(method, isotope, number_of_sidebands, zeta, eta):
+    """Return the simulated line-shapes of single-site spin systems with the given
+    zeta (in ppm) and eta values as an array of shape (zeta.size, count). The
+    function is picklable for use in the worker processes."""
+    spin_systems = [
+        SpinSystem(
+            sites=[dict(isotope=isotope, shielding_symmetric=dict(zeta=z, eta=e))]
+        )
+        for z, e in zip(zeta, eta)
+    ]
+
+    sim = Simulator()
+    sim.config.number_of_sidebands = number_of_sidebands
+    sim.config.decompose_spectrum = "spin_system"
+
+    sim.spin_systems = spin_systems
+    sim.methods = [method]
+    sim.run(pack_as_csdm=False)
+
+    return np.asarray(sim.methods[0].simulation)
+
+
+def _table_lineshapes(method, zeta, eta, table):
+    """Return the sideband amplitudes of the sites with the given zeta (in ppm) and
+    eta values interpolated from the sideband table."""
+    event = method.spectral_dimensions[0].events[0]
+    if abs(event.rotor_angle - table.rotor_angle) > 1e-4:
+        raise ValueError(
+            f"The rotor angle of the table, {table.rotor_angle} rad, does not match "
+            f"the rotor angle of the kernel, {event.rotor_angle} rad."
+        )
+
+    rotor_frequency = event.rotor_frequency  # in Hz
+    freq = method.spectral_dimensions[0].coordinates_Hz()
+    orders = np.rint(freq / rotor_frequency)
+    if not np.allclose(freq, orders * rotor_frequency, atol=1e-6 * rotor_frequency):
+        raise ValueError(
+            "The `table` engine requires the sideband frequencies to coincide with "
+            "the coordinates of the anisotropic dimension."
+        )
+
+    larmor_frequency = _larmor_frequency(method)
+    ratio = zeta * larmor_frequency / rotor_frequency
+    if np.sign(larmor_frequency) != table.larmor_sign:
+        # the sideband orders are mirrored for the opposite sign of the larmor
+        # frequency.
+        ratio = -ratio
+    return table.interpolate(ratio, eta, orders.astype(int))
 
-        sim.spin_systems = spin_systems
-        sim.methods = [method]
-        sim.run(pack_as_csdm=False)
 
-        amp = sim.methods[0].simulation
-        return self._averaged_kernel(amp, supersampling)
+def _larmor_frequency(method):
+    """Return the larmor frequency of the method channel in MHz."""
+    B0 = method.spectral_dimensions[0].events[0].magnetic_flux_density  # in T
+    gamma = method.channels[0].gyromagnetic_ratio  # in MHz/T
+    return -gamma * B0  # in MHz
 
 
 class MAF(ShieldingPALineshape):
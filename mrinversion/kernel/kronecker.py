@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+from functools import reduce
+
+import numpy as np
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+
+class KroneckerKernel:
+    r"""
+    A kernel given as the Kronecker product of two or more factor kernels,
+
+    .. math::
+        {\bf K} = {\bf K}_0 \otimes {\bf K}_1 \otimes \cdots \otimes {\bf K}_{d-1},
+
+    where :math:`{\bf K}_i \in \mathbb{R}^{m_i \times n_i}`. The kernels of separable
+    correlation experiments, such as the T1-T2 and the relaxation-anisotropy
+    correlations, are of this form, where every factor is a kernel from the
+    :class:`~mrinversion.kernel.T1`, :class:`~mrinversion.kernel.T2`, or
+    :class:`~mrinversion.kernel.nmr.ShieldingPALineshape` classes.
+
+    Only the factors are stored. The products with the kernel and its transpose are
+    evaluated as a sequence of products with the factors, without forming the dense
+    :math:`(\prod_i m_i) \times (\prod_i n_i)` matrix. The solution,
+    :math:`{\bf f}`, and the signal, :math:`{\bf s}`, are the row-major (C-order)
+    flattened arrays of shape :math:`(n_0, n_1, \cdots)` and
+    :math:`(m_0, m_1, \cdots)`, respectively.
+
+    The :class:`~mrinversion.linear_model.TSVDCompression` class accepts the object
+    as the kernel, `K`, and evaluates the singular value decomposition of every
+    factor separately. The linear models accept the object with the `gram`, `admm`,
+    and `fista` methods, which solve the problem from the normal equations,
+    :math:`{\bf K}^T{\bf K}` and :math:`{\bf K}^T{\bf s}`, evaluated from the
+    factors. The other methods and the cross-validation require the rows of the
+    kernel and raise a TypeError; compress the kernel with the TSVDCompression class
+    before fitting with these methods.
+
+    Args
+    ----
+
+    factors: list
+        A list of two-dimensional ndarrays, :math:`[{\bf K}_0, {\bf K}_1, \cdots]`.
+
+    Example
+    -------
+
+    >>> from mrinversion.kernel import KroneckerKernel
+    >>> K = KroneckerKernel([K_T1, K_T2])  # doctest: +SKIP
+    """
+
+    def __init__(self, factors):
+        if len(factors) < 2:
+            raise ValueError("The Kronecker kernel requires at least two factors.")
+
+        self.factors = [np.asarray(item, dtype=np.float64) for item in factors]
+        for item in self.factors:
+            if item.ndim != 2:
+                raise ValueError("The factors of the Kronecker kernel must be 2D.")
+
+        self.out_shape = tuple([item.shape[0] for item in self.factors])
+        self.in_shape = tuple([item.shape[1] for item in self.factors])
+
+    @property
+    def shape(self):
+        """The shape of the kernel, (prod(m_i), prod(n_i))."""
+        return (int(np.prod(self.out_shape)), int(np.prod(self.in_shape)))
+
+    @property
+    def ndim(self):
+        """The number of dimensions of the kernel, 2."""
+        return 2
+
+    @property
+    def dtype(self):
+        """The data type of the kernel."""
+        return self.factors[0].dtype
+
+    def __array__(self, dtype=None):
+        return self.toarray() if dtype is None else self.toarray().astype(dtype)
+
+    def toarray(self):
+        """Return the kernel as a dense ndarray."""
+        return reduce(np.kron, self.factors)
+
+    def matvec(self, f):
+        r"""Return the product, :math:`{\bf Kf}`.
+
+        Args:
+            f: A ndarray of shape (n,) or (n, m_count).
+
+        Returns:
+            A ndarray of shape (m,) or (m, m_count).
+        """
+        return _mode_products(self.factors, f, self.in_shape, self.shape[0])
+
+    def rmatvec(self, s):
+        r"""Return the product, :math:`{\bf K}^T{\bf s}`.
+
+        Args:
+            s: A ndarray of shape (m,) or (m, m_count).
+
+        Returns:
+            A ndarray of shape (n,) or (n, m_count).
+        """
+        factors = [item.T for item in self.factors]
+        return _mode_products(factors, s, self.out_shape, self.shape[1])
+
+    def gram(self):
+        r"""Return the Gram matrix, :math:`{\bf K}^T{\bf K} = {\bf K}_0^T{\bf K}_0
+        \otimes {\bf K}_1^T{\bf K}_1 \otimes \cdots`, as a dense :math:`n \times n`
+        ndarray, evaluated from the factors.
+        """
+        return reduce(np.kron, [item.T @ item for item in self.factors])
+
+    def rows(self, index):
+        """Return the rows of the kernel at the given flat indexes as a dense ndarray.
+
+        Args:
+            index: A ndarray of row indexes.
+
+        Returns:
+            A ndarray of shape (index.size, n).
+        """
+        index = np.unravel_index(np.asarray(index).ravel(), self.out_shape)
+        rows = self.factors[0][index[0]]
+        for factor, i in zip(self.factors[1:], index[1:]):
+            rows = (rows[:, :, np.newaxis] * factor[i][:, np.newaxis, :]).reshape(
+                rows.shape[0], -1
+            )
+        return rows
+
+    def svd(self):
+        r"""Return the singular value decomposition of the kernel,
+        :math:`{\bf K} = {\bf U} \text{diag}({\bf S}) {\bf V}^T`, evaluated from the
+        singular value decompositions of the factors,
+        :math:`{\bf K}_i = {\bf U}_i \text{diag}({\bf S}_i) {\bf V}_i^T`.
+
+        Returns:
+            A tuple (U, S, VT), where U and VT are the KroneckerKernel objects of the
+            factors :math:`{\bf U}_i` and :math:`{\bf V}_i^T`, respectively, and S is
+            the ndarray of singular values, :math:`{\bf S}_0 \otimes {\bf S}_1
+            \otimes \cdots`, in the order of the Kronecker product (unsorted).
+        """
+        U, S, VT = zip(
+            *[np.linalg.svd(item, full_matrices=False) for item in self.factors]
+        )
+        return KroneckerKernel(U), reduce(np.kron, S), KroneckerKernel(VT)
+
+
+def _mode_products(factors, x, shape, size):
+    """Return the product of the Kronecker product of the factors with x, evaluated
+    as a product with each factor along the respective axis of x reshaped to
+    `shape`. `size` is the length of axis 0 of the product."""
+    x = np.asarray(x)
+    columns = x.shape[1:]
+    x = x.reshape(shape + (-1,))
+    for i, factor in enumerate(factors):
+        x = np.moveaxis(np.tensordot(factor, x, axes=(1, i)), 0, i)
+    return x.reshape((size,) + columns)
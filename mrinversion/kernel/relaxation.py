@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import numpy as np
+from scipy.special import exp1
 
+from .utils import _cell_boundaries
 from .utils import _supersampled_coordinates
 from mrinversion.kernel.base import BaseModel
 
@@ -22,16 +24,27 @@ class T2(BaseModel):
     def __init__(self, kernel_dimension, inverse_kernel_dimension):
         super().__init__(kernel_dimension, inverse_kernel_dimension, 1, 1)
 
-    def kernel(self, supersampling=1):
+    def kernel(self, supersampling=1, analytic=False):
         """
         Return the kernel of T2 decaying functions.
 
         Args:
             supersampling: An integer. Each cell is supersampled by the factor
                     `supersampling`.
+            analytic: If True, the decay is averaged over every inverse grid cell
+                    in closed form using the exponential integral, and
+                    `supersampling` is ignored. The cells of a linear dimension are
+                    averaged uniformly, and the cells of a monotonic dimension are
+                    averaged uniformly on a logarithmic scale. The default is False.
         Returns:
             A numpy array.
         """
+        if analytic:
+            amp = _cell_averaged_decay(
+                self.kernel_dimension, self.inverse_kernel_dimension
+            )
+            return self._normalized_kernel(amp)
+
         x = self.kernel_dimension.coordinates
         x_inverse = _supersampled_coordinates(
             self.inverse_kernel_dimension, supersampling=supersampling
@@ -57,10 +70,64 @@ class T1(BaseModel):
     def __init__(self, kernel_dimension, inverse_kernel_dimension):
         super().__init__(kernel_dimension, inverse_kernel_dimension, 1, 1)
 
-    def kernel(self, supersampling=1):
+    def kernel(self, supersampling=1, analytic=False):
+        """
+        Return the kernel of T1 recovery functions.
+
+        Args:
+            supersampling: An integer. Each cell is supersampled by the factor
+                    `supersampling`.
+            analytic: If True, the recovery is averaged over every inverse grid cell
+                    in closed form using the exponential integral, and
+                    `supersampling` is ignored. The cells of a linear dimension are
+                    averaged uniformly, and the cells of a monotonic dimension are
+                    averaged uniformly on a logarithmic scale. The default is False.
+        Returns:
+            A numpy array.
+        """
+        if analytic:
+            amp = _cell_averaged_decay(
+                self.kernel_dimension, self.inverse_kernel_dimension
+            )
+            return self._normalized_kernel(1 - amp)
+
         x = self.kernel_dimension.coordinates
         x_inverse = _supersampled_coordinates(
             self.inverse_kernel_dimension, supersampling=supersampling
         )
         amp = 1 - np.exp(np.tensordot(-(1 / x_inverse), x, 0))
         return self._averaged_kernel(amp, supersampling)
+
+
+def _cell_averaged_decay(kernel_dimension, inverse_dimension):
+    r"""Return the average of :math:`\exp(-x/x_\text{inv})` over the cells of the
+    inverse dimension, as an array of shape (inverse count, kernel count).
+
+    Over a linear cell :math:`[a, b]`, the average is :math:`(A(b) - A(a))/(b - a)`,
+    where :math:`A(T) = T e^{-x/T} - x E_1(x/T)` is the antiderivative of
+    :math:`e^{-x/T}` and :math:`E_1` is the exponential integral. Over a monotonic
+    cell, the average on a logarithmic scale is
+    :math:`(E_1(x/b) - E_1(x/a))/\ln(b/a)`.
+    """
+    edges = _cell_boundaries(inverse_dimension)
+    x = kernel_dimension.coordinates.to(edges.unit).value[np.newaxis, :]
+    edges = edges.value[:, np.newaxis]
+    lower, upper = edges[:-1], edges[1:]
+
+    if inverse_dimension.type == "monotonic":
+        with np.errstate(invalid="ignore"):
+            amp = (exp1(x / upper) - exp1(x / lower)) / np.log(upper / lower)
+        amp[:, x[0] == 0] = 1.0
+        return amp
+
+    # relaxation times are non-negative.
+    lower, upper = np.maximum(lower, 0), np.maximum(upper, 0)
+    return (_decay_integral(x, upper) - _decay_integral(x, lower)) / (upper - lower)
+
+
+def _decay_integral(x, T):
+    """The antiderivative of exp(-x/T) with respect to T, with A(0) = 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.where(T > 0, x / T, np.inf)
+        amp = T * np.exp(-u) - x * exp1(u)
+    return np.where(x == 0, T, np.where(T > 0, amp, 0.0))
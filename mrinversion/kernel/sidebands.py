@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+import numpy as np
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+
+class SidebandTable:
+    r"""
+    A lookup table of the spinning sideband amplitudes of the nuclear shielding
+    resonances.
+
+    The relative sideband amplitudes of a site depend only on the ratio of the
+    anisotropy to the spin rate, :math:`\zeta/\nu_r` (with :math:`\zeta` in units of
+    Hz), the asymmetry parameter, :math:`\eta`, and the rotor angle. A table,
+    therefore, serves every spin rate, magnetic flux density, and isotope.
+    The amplitudes at arbitrary :math:`(\zeta/\nu_r, \eta)` are evaluated with a
+    bilinear interpolation over the table.
+
+    Use the :meth:`~mrinversion.kernel.SidebandTable.simulate` method to generate a
+    table, and the `table` argument of the
+    :meth:`~mrinversion.kernel.nmr.SpinningSidebands.kernel` method to generate the
+    kernel from the table.
+
+    Args
+    ----
+
+    ratio: ndarray
+        A uniformly spaced array of :math:`\zeta/\nu_r` values.
+    eta: ndarray
+        A uniformly spaced array of :math:`\eta` values over [0, 1].
+    amplitudes: ndarray
+        A ndarray of shape (ratio.size, eta.size, n) with the sideband amplitudes,
+        where n is the number of sideband orders.
+    rotor_angle: float
+        The rotor angle in radians. The default is the magic angle.
+    larmor_sign: int
+        The sign of the larmor frequency of the isotope used to simulate the table.
+        The sideband orders are mirrored for isotopes with the opposite sign. The
+        default is -1, the sign of the 1H larmor frequency.
+
+    Attributes
+    ----------
+
+    orders: ndarray
+        The sideband orders, :math:`[-n/2, n/2)`, along the last axis of the amplitudes.
+    key: str
+        A hash of the table content.
+    """
+
+    def __init__(self, ratio, eta, amplitudes, rotor_angle=0.9553166, larmor_sign=-1):
+        self.ratio = np.asarray(ratio, dtype=np.float64)
+        self.eta = np.asarray(eta, dtype=np.float64)
+        self.amplitudes = np.asarray(amplitudes, dtype=np.float64)
+        self.rotor_angle = float(rotor_angle)
+        self.larmor_sign = -1 if larmor_sign < 0 else 1
+
+        if self.ratio.size < 2 or self.eta.size < 2:
+            raise ValueError(
+                "The table requires at least two ratio and two eta values."
+            )
+
+        shape = (self.ratio.size, self.eta.size)
+        if self.amplitudes.shape[:2] != shape:
+            raise ValueError(
+                f"The shape of the amplitudes array, {self.amplitudes.shape[:2]}, "
+                f"along the first two axes must be {shape}."
+            )
+
+        n = self.amplitudes.shape[2]
+        self.orders = np.arange(n) - int(n / 2)
+
+        content = hashlib.sha256(self.amplitudes.tobytes())
+        content.update(self.ratio.tobytes())
+        content.update(self.eta.tobytes())
+        content.update(str(self.rotor_angle).encode("utf-8"))
+        content.update(str(self.larmor_sign).encode("utf-8"))
+        self.key = content.hexdigest()
+
+    @classmethod
+    def simulate(
+        cls,
+        max_ratio=20,
+        n_ratio=401,
+        n_eta=21,
+        number_of_sidebands=64,
+        rotor_angle="54.735 deg",
+    ):
+        r"""Simulate the sideband amplitude table using mrsimulator.
+
+        Args:
+            max_ratio: The maximum absolute value of :math:`\zeta/\nu_r`. The default
+                is 20.
+            n_ratio: The number of uniformly spaced :math:`\zeta/\nu_r` values over
+                [-max_ratio, max_ratio]. The default is 401.
+            n_eta: The number of uniformly spaced :math:`\eta` values over [0, 1].
+                The default is 21.
+            number_of_sidebands: The number of sideband orders. The default is 64.
+            rotor_angle: The rotor angle. The default is the magic angle.
+
+        Returns:
+            A SidebandTable object.
+        """
+        from mrsimulator import Simulator
+        from mrsimulator import SpinSystem
+        from mrsimulator.methods import BlochDecaySpectrum
+
+        # The table is independent of the spin rate, field, and isotope. The values
+        # below are arbitrary.
+        rotor_frequency = 1000.0  # in Hz
+        method = BlochDecaySpectrum.parse_dict_with_units(
+            dict(
+                channels=["1H"],
+                magnetic_flux_density="9.4 T",
+                rotor_angle=rotor_angle,
+                rotor_frequency=f"{rotor_frequency} Hz",
+                spectral_dimensions=[
+                    dict(
+                        count=number_of_sidebands,
+                        spectral_width=f"{number_of_sidebands * rotor_frequency} Hz",
+                        reference_offset="0 Hz",
+                    )
+                ],
+            )
+        )
+        event = method.spectral_dimensions[0].events[0]
+        larmor_frequency = -method.channels[0].gyromagnetic_ratio
+        larmor_frequency *= event.magnetic_flux_density  # in MHz
+
+        ratio = np.linspace(-max_ratio, max_ratio, n_ratio)
+        eta = np.linspace(0, 1, n_eta)
+        ratio_grid, eta_grid = np.meshgrid(ratio, eta, indexing="ij")
+        zeta = ratio_grid.ravel() * rotor_frequency / larmor_frequency  # in ppm
+
+        spin_systems = [
+            SpinSystem(
+                sites=[dict(isotope="1H", shielding_symmetric=dict(zeta=z, eta=e))]
+            )
+            for z, e in zip(zeta, eta_grid.ravel())
+        ]
+
+        sim = Simulator()
+        sim.config.number_of_sidebands = number_of_sidebands
+        sim.config.decompose_spectrum = "spin_system"
+        sim.spin_systems = spin_systems
+        sim.methods = [method]
+        sim.run(pack_as_csdm=False)
+
+        amp = np.asarray(sim.methods[0].simulation)
+        amp = amp.reshape(n_ratio, n_eta, number_of_sidebands)
+
+        # normalize to the total amplitude of a site with zero anisotropy.
+        amp /= amp[np.argmin(np.abs(ratio)), 0].sum()
+        return cls(ratio, eta, amp, event.rotor_angle, np.sign(larmor_frequency))
+
+    def save(self, filename):
+        """Save the table to a `.npz` file.
+
+        Args:
+            filename: The name of the file.
+        """
+        np.savez(
+            filename,
+            ratio=self.ratio,
+            eta=self.eta,
+            amplitudes=self.amplitudes,
+            rotor_angle=self.rotor_angle,
+            larmor_sign=self.larmor_sign,
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Load the table from a `.npz` file.
+
+        Args:
+            filename: The name of the file.
+
+        Returns:
+            A SidebandTable object.
+        """
+        with np.load(filename) as data:
+            return cls(
+                data["ratio"],
+                data["eta"],
+                data["amplitudes"],
+                float(data["rotor_angle"]),
+                int(data["larmor_sign"]) if "larmor_sign" in data else -1,
+            )
+
+    def interpolate(self, ratio, eta, orders=None):
+        r"""Return the sideband amplitudes at the given :math:`\zeta/\nu_r` and
+        :math:`\eta` values.
+
+        Args:
+            ratio: A ndarray of :math:`\zeta/\nu_r` values.
+            eta: A ndarray of :math:`\eta` values.
+            orders: A ndarray of the sideband orders. The amplitudes of orders outside
+                the table are zero. The default is all the orders of the table.
+
+        Returns:
+            A ndarray of shape (ratio.size, orders.size).
+        """
+        ratio = np.asarray(ratio, dtype=np.float64).ravel()
+        eta = np.asarray(eta, dtype=np.float64).ravel()
+
+        tolerance = 1e-9 * (self.ratio[-1] - self.ratio[0])
+        outside = (ratio < self.ratio[0] - tolerance) | (
+            ratio > self.ratio[-1] + tolerance
+        )
+        if np.any(outside):
+            raise ValueError(
+                "The ratio of the anisotropy to the spin rate is outside the range of "
+                f"the table, [{self.ratio[0]}, {self.ratio[-1]}]."
+            )
+
+        i, w_i = _interpolation_weights(self.ratio, ratio)
+        j, w_j = _interpolation_weights(self.eta, eta)
+
+        A = self.amplitudes
+        amp = (1 - w_i) * (1 - w_j) * A[i, j].T
+        amp += (1 - w_i) * w_j * A[i, j + 1].T
+        amp += w_i * (1 - w_j) * A[i + 1, j].T
+        amp += w_i * w_j * A[i + 1, j + 1].T
+        amp = amp.T
+
+        if orders is None:
+            return amp
+
+        orders = np.asarray(orders, dtype=int)
+        index = orders - self.orders[0]
+        inside = (index >= 0) & (index < self.orders.size)
+
+        result = np.zeros((ratio.size, orders.size))
+        result[:, inside] = amp[:, index[inside]]
+        return result
+
+
+def _interpolation_weights(grid, values):
+    """Return the lower indexes and the linear interpolation weights of the values
+    over the uniformly spaced grid."""
+    position = (values - grid[0]) / (grid[1] - grid[0])
+    position = np.clip(position, 0, grid.size - 1)
+    index = np.minimum(position.astype(int), grid.size - 2)
+    return index, position - index
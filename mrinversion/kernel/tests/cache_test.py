@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from mrinversion.kernel import KernelCache
+
+
+def test_cache_store_and_load(tmp_path):
+    cache = KernelCache(directory=str(tmp_path))
+    key = cache.key({"channels": ["29Si"]}, 4)
+
+    assert cache.load(key) is None
+    assert key not in cache
+
+    K = np.random.rand(10, 16)
+    K_cached = cache.store(key, K)
+    assert isinstance(K_cached, np.memmap)
+    assert np.allclose(K_cached, K)
+
+    assert key in cache
+    assert len(cache) == 1
+    assert np.allclose(cache.load(key), K)
+
+    # different arguments produce a different key.
+    assert cache.key({"channels": ["29Si"]}, 2) != key
+    assert cache.key({"channels": ["29Si"]}, 4) == key
+
+
+def test_cache_lru_eviction(tmp_path):
+    K = np.random.rand(16, 16)
+    size = K.nbytes + 128  # data and the npy header
+    cache = KernelCache(directory=str(tmp_path), max_size=2 * size)
+
+    keys = [cache.key(i) for i in range(3)]
+    cache.store(keys[0], K)
+    cache.store(keys[1], K)
+    os.utime(cache.path(keys[0]), (0, 0))
+    os.utime(cache.path(keys[1]), (1, 1))
+
+    # access the first entry so that the second entry is the least recently used.
+    _ = cache.load(keys[0])
+    cache.store(keys[2], K)
+
+    assert keys[0] in cache
+    assert keys[1] not in cache
+    assert keys[2] in cache
+    assert set(cache.keys()) == {keys[0], keys[2]}
+
+    info = cache.info()
+    assert info["entries"] == 2
+    assert info["size"] <= info["max_size"]
+
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import csdmpy as cp
+import numpy as np
+import pytest
+
+from mrinversion.kernel import KroneckerKernel
+from mrinversion.linear_model import SmoothLasso
+from mrinversion.linear_model import SmoothLassoCV
+from mrinversion.linear_model import TSVDCompression
+
+np.random.seed(0)
+A = np.random.rand(6, 4)
+B = np.random.rand(5, 3)
+C = np.random.rand(2, 2)
+K_dense = np.kron(np.kron(A, B), C)
+
+
+def test_kronecker_kernel_products():
+    K = KroneckerKernel([A, B, C])
+    assert K.shape == (60, 24)
+    assert np.allclose(np.asarray(K), K_dense)
+
+    f = np.random.rand(24, 3)
+    assert np.allclose(K.matvec(f), K_dense @ f)
+    assert np.allclose(K.matvec(f[:, 0]), K_dense @ f[:, 0])
+
+    s = np.random.rand(60, 3)
+    assert np.allclose(K.rmatvec(s), K_dense.T @ s)
+    assert np.allclose(K.rows([0, 7, 59]), K_dense[[0, 7, 59]])
+
+    assert np.allclose(K.gram(), K_dense.T @ K_dense)
+
+    U, S, VT = K.svd()
+    assert np.allclose(U.toarray() @ np.diag(S) @ VT.toarray(), K_dense)
+
+    error = "requires at least two factors"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        KroneckerKernel([A])
+
+
+def test_kronecker_kernel_compression():
+    K = KroneckerKernel([A, B])
+    K_dense = np.kron(A, B)
+    s = np.random.rand(30)
+
+    compressed = TSVDCompression(K, s, r=8)
+    compressed_dense = TSVDCompression(K_dense, s, r=8)
+    assert compressed.truncation_index == 8
+
+    # the compressed systems are identical up to an orthogonal transformation.
+    K_tilde, s_tilde = compressed.compressed_K, compressed.compressed_s
+    K_tilde_dense = compressed_dense.compressed_K
+    s_tilde_dense = compressed_dense.compressed_s
+    assert np.allclose(K_tilde.T @ K_tilde, K_tilde_dense.T @ K_tilde_dense)
+    assert np.allclose(K_tilde.T @ s_tilde, K_tilde_dense.T @ s_tilde_dense)
+
+
+def test_kronecker_kernel_fit():
+    A_ = np.random.rand(20, 4)
+    B_ = np.random.rand(15, 3)
+    K = KroneckerKernel([A_, B_])
+    K_dense = np.kron(A_, B_)
+    s = K_dense @ np.random.rand(12)
+    inverse_dimension = [
+        cp.Dimension(type="linear", count=3, increment="1 Hz"),
+        cp.Dimension(type="linear", count=4, increment="1 Hz"),
+    ]
+    kwargs = dict(alpha=1e-4, lambda1=1e-6, inverse_dimension=inverse_dimension)
+
+    for method in ["gram", "fista"]:
+        s_lasso = SmoothLasso(method=method, tolerance=1e-10, **kwargs)
+        s_lasso.fit(K, s)
+        s_lasso_dense = SmoothLasso(method=method, tolerance=1e-10, **kwargs)
+        s_lasso_dense.fit(K_dense, s)
+        assert np.allclose(s_lasso.f, s_lasso_dense.f)
+        assert np.allclose(s_lasso.predict(K), s_lasso_dense.predict(K_dense))
+
+    error = "A KroneckerKernel is only applicable to the methods"
+    with pytest.raises(TypeError, match=".*{0}.*".format(error)):
+        SmoothLasso(**kwargs).fit(K, s)
+
+    error = "The cross-validation requires the rows of the kernel"
+    with pytest.raises(TypeError, match=".*{0}.*".format(error)):
+        SmoothLassoCV(
+            alphas=[1e-4], lambdas=[1e-6], inverse_dimension=inverse_dimension
+        ).fit(K, s)
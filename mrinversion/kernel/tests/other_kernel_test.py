@@ -38,3 +38,37 @@ def test_T1_kernel():
     amp = 1 - np.exp(np.tensordot(-x, (1 / x_inverse), 0))
     amp /= amp[:, 0].sum()
     assert np.allclose(K, amp)
+
+
+def test_analytic_relaxation_kernels():
+    linear_dimension = cp.Dimension(
+        type="linear", count=10, increment="0.1 s", coordinates_offset="0.05 s"
+    )
+    for kernel_class in [T1, T2]:
+        obj = kernel_class(
+            kernel_dimension=kernel_dimension,
+            inverse_kernel_dimension=linear_dimension,
+        )
+        K = obj.kernel(analytic=True)
+        K_supersampled = obj.kernel(supersampling=256)
+        assert np.allclose(K, K_supersampled, atol=1e-6)
+
+        obj = kernel_class(
+            kernel_dimension=kernel_dimension,
+            inverse_kernel_dimension=inverse_kernel_dimension,
+        )
+        K = obj.kernel(analytic=True)
+        assert K.shape == (96, 5)
+        assert np.all(np.isfinite(K))
+        assert np.allclose(K[:, 0].sum(), 1)
+
+
+def test_monotonic_supersampled_relaxation_kernels():
+    for kernel_class in [T1, T2]:
+        obj = kernel_class(
+            kernel_dimension=kernel_dimension,
+            inverse_kernel_dimension=inverse_kernel_dimension,
+        )
+        K = obj.kernel(supersampling=64)
+        assert K.shape == (96, 5)
+        assert np.allclose(K, obj.kernel(analytic=True), atol=1e-4)
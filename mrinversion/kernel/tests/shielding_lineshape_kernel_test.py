@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import csdmpy as cp
 import numpy as np
+import pytest
 from mrsimulator import Simulator
 from mrsimulator import Site
 from mrsimulator import SpinSystem
 from mrsimulator.methods import BlochDecaySpectrum
 
+from mrinversion.kernel import KernelCache
+from mrinversion.kernel import SidebandTable
 from mrinversion.kernel.nmr import MAF
 from mrinversion.kernel.nmr import ShieldingPALineshape
 from mrinversion.kernel.nmr import SpinningSidebands
@@ -180,3 +183,119 @@ def test_spinning_sidebands_kernel():
 
     _ = TSVDCompression(K, s=np.arange(96))
     assert _.truncation_index == 15
+
+
+def test_cached_lineshape_kernel(tmp_path):
+    cache = KernelCache(directory=str(tmp_path))
+    ns_obj = MAF(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    K = ns_obj.kernel(supersampling=1)
+    K_cached = ns_obj.kernel(supersampling=1, cache=cache)
+    assert np.allclose(K, K_cached)
+    assert len(cache) == 1
+
+    K_cached = ns_obj.kernel(supersampling=1, cache=cache)
+    assert isinstance(K_cached, np.memmap)
+    assert np.allclose(K, K_cached)
+    assert len(cache) == 1
+
+    _ = ns_obj.kernel(supersampling=2, cache=cache)
+    assert len(cache) == 2
+
+
+def test_scaled_engine_lineshape_kernel():
+    ns_obj = MAF(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    K_exact = ns_obj.kernel(supersampling=2)
+    K_scaled = ns_obj.kernel(supersampling=2, engine="scaled")
+
+    assert K_scaled.shape == K_exact.shape
+    error = np.linalg.norm(K_scaled - K_exact) / np.linalg.norm(K_exact)
+    assert error < 0.05
+
+    error = "is an invalid engine"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        ns_obj.kernel(supersampling=1, engine="fast")
+
+    ns_obj = SpinningSidebands(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    error = "engine is only applicable to the infinite spinning speed kernels"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        ns_obj.kernel(supersampling=1, engine="scaled")
+
+
+def test_table_engine_spinning_sidebands_kernel():
+    ns_obj = SpinningSidebands(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    K_exact = ns_obj.kernel(supersampling=1)
+
+    table = SidebandTable.simulate(
+        max_ratio=64, n_ratio=257, n_eta=21, number_of_sidebands=96
+    )
+    K_table = ns_obj.kernel(supersampling=1, engine="table", table=table)
+
+    assert K_table.shape == K_exact.shape
+    error = np.linalg.norm(K_table - K_exact) / np.linalg.norm(K_exact)
+    assert error < 0.05
+
+    error = "The `table` engine requires a SidebandTable object"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        ns_obj.kernel(supersampling=1, engine="table")
+
+
+def test_chunked_lineshape_kernel():
+    ns_obj = MAF(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    K = ns_obj.kernel(supersampling=2)
+    assert ns_obj._rows_per_chunk(2, max_memory=1) == 1
+
+    K_chunked = ns_obj.kernel(supersampling=2, max_memory=1)
+    assert np.allclose(K, K_chunked)
+
+
+def test_parallel_lineshape_kernel():
+    ns_obj = SpinningSidebands(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    K = ns_obj.kernel(supersampling=2)
+    K_parallel = ns_obj.kernel(supersampling=2, n_jobs=2)
+    assert np.array_equal(K, K_parallel)
+
+
+def test_lineshapes_of_duplicate_sites():
+    ns_obj = SpinningSidebands(
+        anisotropic_dimension=anisotropic_dimension,
+        inverse_dimension=inverse_dimension,
+        channel="29Si",
+        magnetic_flux_density="9.4 T",
+    )
+    method = BlochDecaySpectrum.parse_dict_with_units(ns_obj.method_args)
+    zeta = np.asarray([10.0, -5.0, 10.0, 0.0, -5.0, 10.0])
+    eta = np.asarray([0.5, 0.0, 0.5, 0.0, 0.0, 0.2])
+
+    amp = ns_obj._lineshapes(method, zeta, eta, "exact", None)
+    amp_all = ns_obj._simulate(method, zeta, eta)
+    assert np.array_equal(amp, amp_all)
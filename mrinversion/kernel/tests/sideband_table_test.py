@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from mrinversion.kernel import SidebandTable
+
+
+def linear_table():
+    ratio = np.linspace(-4, 4, 9)
+    eta = np.linspace(0, 1, 5)
+    orders = np.arange(8) - 4
+    amp = ratio[:, None, None] + 2 * eta[None, :, None] + 10 * orders + 100.0
+    return SidebandTable(ratio, eta, amp)
+
+
+def test_sideband_table_interpolation():
+    table = linear_table()
+    assert np.allclose(table.orders, np.arange(8) - 4)
+
+    ratio = np.asarray([-3.7, 0.2, 2.5, 4.0])
+    eta = np.asarray([0.0, 0.33, 0.9, 1.0])
+    amp = table.interpolate(ratio, eta)
+    expected = ratio[:, None] + 2 * eta[:, None] + 10 * table.orders + 100
+    assert amp.shape == (4, 8)
+    assert np.allclose(amp, expected)
+
+    # orders outside the table are zero.
+    orders = np.asarray([-6, -4, 0, 3, 5])
+    amp = table.interpolate(ratio, eta, orders)
+    assert amp.shape == (4, 5)
+    assert np.allclose(amp[:, 0], 0)
+    assert np.allclose(amp[:, -1], 0)
+    assert np.allclose(amp[:, 1:4], expected[:, [0, 4, 7]])
+
+    error = "The ratio of the anisotropy to the spin rate is outside the range"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        table.interpolate([5.0], [0.5])
+
+
+def test_sideband_table_save_load(tmp_path):
+    table = linear_table()
+    filename = str(tmp_path / "table.npz")
+    table.save(filename)
+
+    new_table = SidebandTable.load(filename)
+    assert np.allclose(new_table.amplitudes, table.amplitudes)
+    assert new_table.rotor_angle == table.rotor_angle
+    assert new_table.larmor_sign == table.larmor_sign
+    assert new_table.key == table.key
+
+    mirrored = SidebandTable(table.ratio, table.eta, table.amplitudes, larmor_sign=1)
+    assert mirrored.key != table.key
+
+    error = "The shape of the amplitudes array"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        SidebandTable(table.ratio, table.eta[1:], table.amplitudes)
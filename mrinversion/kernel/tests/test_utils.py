@@ -2,6 +2,7 @@
 import csdmpy as cp
 import numpy as np
 
+from mrinversion.kernel.utils import _scaled_lineshapes_from_table
 from mrinversion.kernel.utils import _supersampled_coordinates
 from mrinversion.kernel.utils import _x_y_to_zeta_eta
 from mrinversion.kernel.utils import _x_y_to_zeta_eta_distribution
@@ -85,3 +86,50 @@ def test_supersampling():
         y_oversampled = _supersampled_coordinates(dim, supersampling=oversample)
         y_reduced = y_oversampled.reshape(-1, oversample).mean(axis=-1)
         assert np.allclose(y_reduced.value, y)
+
+
+def test_monotonic_supersampling():
+    dim = cp.MonotonicDimension(coordinates=["1 ms", "10 ms", "100 ms", "1 s"])
+
+    y = np.log10(dim.coordinates.to("ms").value)
+    for i in range(10):
+        oversample = i + 1
+        y_oversampled = _supersampled_coordinates(dim, supersampling=oversample)
+        assert y_oversampled.size == 4 * oversample
+        y_oversampled = np.log10(y_oversampled.to("ms").value)
+        y_reduced = y_oversampled.reshape(-1, oversample).mean(axis=-1)
+        assert np.allclose(y_reduced, y)
+
+
+def test_scaled_lineshapes_from_table():
+    # a uniform unit-anisotropy line-shape over [0, 1] for eta=0 and [0, 0.5] for
+    # eta=1.
+    table_edges = np.linspace(-1, 1, 201)
+    cdf = np.zeros((2, 201))
+    cdf[0] = np.clip(table_edges, 0, 1)
+    cdf[1] = np.clip(2 * table_edges, 0, 1)
+
+    edges = np.arange(-10, 11, 1.0)
+    zeta = np.asarray([4.0, -4.0, 8.0, 0.0])
+    eta = np.asarray([0.0, 0.0, 1.0, 0.5])
+
+    amp = _scaled_lineshapes_from_table(cdf, table_edges, zeta, eta, edges)
+
+    assert amp.shape == (4, 20)
+    assert np.allclose(amp.sum(axis=1), 1)
+
+    # zeta = 4, eta = 0: uniform over [0, 4].
+    expected = np.zeros(20)
+    expected[10:14] = 0.25
+    assert np.allclose(amp[0], expected)
+
+    # zeta = -4, eta = 0: uniform over [-4, 0].
+    assert np.allclose(amp[1], expected[::-1])
+
+    # zeta = 8, eta = 1: uniform over [0, 4].
+    assert np.allclose(amp[2], expected)
+
+    # zeta = 0: a delta function at zero frequency.
+    expected = np.zeros(20)
+    expected[10] = 1
+    assert np.allclose(amp[3], expected)
@@ -152,7 +152,14 @@ def _supersampled_coordinates(dimension, supersampling=1):
             .. math::
                 x = [0 .. (nm-1)] \Delta_x + \x_0 - \frac{1}{2} \Delta_x (m-1)
 
-            where :math:`\Delta_x' = \frac{\Delta_x}{m}`.
+            where :math:`\Delta_x' = \frac{\Delta_x}{m}`. For a monotonic
+            dimension, every cell, :math:`[a, b]`, between the boundaries given by
+            :func:`_cell_boundaries` is supersampled geometrically at
+
+            .. math::
+                x = a \left(\frac{b}{a}\right)^{(k + 1/2)/m}, {~~~~} k = [0 .. (m-1)],
+
+            that is, uniformly on a logarithmic scale.
 
     Returns:
         An `Quantity` array of coordinates.
@@ -164,4 +171,103 @@ def _supersampled_coordinates(dimension, supersampling=1):
         array += dimension.coordinates_offset
         # shift the coordinates by half a bin for proper averaging
         array -= 0.5 * increment * (supersampling - 1)
+
+    if dimension.type == "monotonic" and supersampling > 1:
+        edges = _cell_boundaries(dimension)
+        lower, ratio = edges[:-1, np.newaxis], (edges[1:] / edges[:-1])[:, np.newaxis]
+        fraction = (np.arange(supersampling) + 0.5) / supersampling
+        array = (lower * ratio.value ** fraction).ravel()
     return array
+
+
+def _cell_boundaries(dimension):
+    r"""The boundaries of the grid cells along the dimension.
+
+    The boundaries of a linear dimension are the midpoints between the coordinates,
+    :math:`x_i \pm \frac{1}{2}\Delta_x`. The boundaries of a monotonic dimension are
+    the geometric midpoints between the coordinates, :math:`\sqrt{x_i x_{i+1}}`, with
+    the outer boundaries extrapolated geometrically, such that a logarithmically
+    spaced dimension has cells of uniform width on a logarithmic scale.
+
+    Args:
+        dimension: A linear or monotonic Dimension object. The coordinates of a
+            monotonic dimension must be positive.
+
+    Returns:
+        An `Quantity` array of count + 1 boundaries.
+    """
+    array = dimension.coordinates
+    if dimension.type == "linear":
+        increment = dimension.increment
+        return np.append(array - 0.5 * increment, array[-1] + 0.5 * increment)
+
+    if array.size < 2 or np.any(array.value <= 0):
+        raise ValueError(
+            "The cell boundaries of a monotonic dimension require at least two "
+            "positive coordinates."
+        )
+    mid = np.sqrt(array[1:] * array[:-1])
+    first = array[0] * np.sqrt(array[0] / array[1])
+    last = array[-1] * np.sqrt(array[-1] / array[-2])
+    return np.concatenate([[first.value], mid.value, [last.value]]) * array.unit
+
+
+def _scaled_lineshapes_from_table(cdf, table_edges, zeta, eta, edges, chunk=4096):
+    r"""Return the bin-integrated line-shapes of sites with anisotropy `zeta` and
+    asymmetry `eta`, evaluated by rescaling a table of unit-anisotropy line-shapes.
+
+    The line-shape of a site with anisotropy :math:`\zeta` is the unit-anisotropy
+    line-shape stretched by :math:`\zeta` along the frequency axis. The fraction of
+    the line-shape within the frequency bin :math:`[\nu_a, \nu_b]` is given as
+    :math:`G(\nu_b) - G(\nu_a)`, where :math:`G(\nu) = F_\eta(\nu/\zeta)` for
+    :math:`\zeta > 0`, :math:`G(\nu) = 1 - F_\eta(\nu/\zeta)` for :math:`\zeta < 0`,
+    and :math:`F_\eta` is the cumulative unit-anisotropy line-shape, linearly
+    interpolated along the frequency and eta axes.
+
+    Args:
+        cdf: A ndarray of shape (n_eta, n_edges) with the cumulative unit-anisotropy
+            line-shapes, where the rows correspond to the eta values uniformly
+            sampled over [0, 1].
+        table_edges: A ndarray of n_edges uniformly spaced frequencies at which the
+            cumulative line-shapes are evaluated.
+        zeta: A ndarray of anisotropy in units of the table unit-anisotropy.
+        eta: A ndarray of asymmetry parameters.
+        edges: A ndarray of frequency bin edges of the kernel line-shapes, in the same
+            unit as `table_edges`.
+        chunk: The number of sites evaluated at once.
+
+    Returns:
+        A ndarray of shape (zeta.size, edges.size - 1).
+    """
+    n_eta, n_edges = cdf.shape
+    cdf_flat = cdf.ravel()
+    start = table_edges[0]
+    step = table_edges[1] - table_edges[0]
+
+    zeta = np.asarray(zeta, dtype=np.float64)
+    eta = np.asarray(eta, dtype=np.float64)
+    amp = np.empty((zeta.size, edges.size - 1))
+    for i in range(0, zeta.size, chunk):
+        zeta_ = zeta[i : i + chunk, np.newaxis]
+        zero = zeta_[:, 0] == 0
+
+        # linear interpolation weights along eta.
+        eta_index = np.clip(eta[i : i + chunk], 0, 1) * (n_eta - 1)
+        lo = np.minimum(eta_index.astype(int), n_eta - 2)
+        weight = (eta_index - lo)[:, np.newaxis]
+        lo = lo[:, np.newaxis] * n_edges
+
+        # linear interpolation weights along frequency.
+        freq = edges[np.newaxis, :] / np.where(zeta_ == 0, 1.0, zeta_)
+        index = np.clip((freq - start) / step, 0, n_edges - 1)
+        k = np.minimum(index.astype(int), n_edges - 2)
+        t = index - k
+
+        F = (1 - weight) * ((1 - t) * cdf_flat[lo + k] + t * cdf_flat[lo + k + 1])
+        lo += n_edges
+        F += weight * ((1 - t) * cdf_flat[lo + k] + t * cdf_flat[lo + k + 1])
+
+        G = np.where(zeta_ > 0, F, 1 - F)
+        G[zero] = edges > 0
+        amp[i : i + chunk] = np.diff(G, axis=1)
+    return amp
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+from .alpha_selection import AlphaSelection  # noqa: F401
 from .smooth_lasso import SmoothLasso  # noqa: F401
 from .smooth_lasso import SmoothLassoCV  # noqa: F401
 from .tsvd_compression import TSVDCompression  # noqa: F401
+from .tsvd_compression import TSVDCompressor  # noqa: F401
+from .tsvd_compression import load_memmap  # noqa: F401
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from scipy import sparse
+from scipy.linalg import cho_factor
+from scipy.linalg import cho_solve
+from sklearn.metrics import r2_score
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+
+class ADMMLasso:
+    r"""
+    The Lasso estimator solved with the alternating direction method of multipliers
+    (ADMM). The estimator minimizes the objective function of the scikit-learn Lasso,
+
+    .. math::
+        \frac{1}{2 N} \| {\bf Xw - y} \|^2_2 + a \| {\bf w} \|_1,
+
+    over the splitting, :math:`{\bf w} = {\bf z}`, where :math:`N` is the number of
+    samples and :math:`a` is the `alpha` parameter. Every iteration solves the
+    linear system, :math:`({\bf X}^T{\bf X} + \rho {\bf I}) {\bf w} = {\bf X}^T{\bf y}
+    + \rho ({\bf z - u})`, with the cached Cholesky factorization of the matrix,
+    followed by the soft-thresholding of :math:`{\bf z}`. The factorization depends
+    only on the Gram matrix, :math:`{\bf X}^T{\bf X}`, and is reused for every
+    alpha and every column of :math:`{\bf y}`, which are solved as a single batched
+    matrix solve.
+
+    Args:
+        alpha: Float, the l1 hyperparameter, :math:`a`.
+        rho: Float, the ADMM penalty parameter, :math:`\rho`. The default is None,
+            that is, the mean of the diagonal of the Gram matrix.
+        max_iter: Integer, the maximum number of iterations.
+        tol: Float, the relative tolerance of the primal and dual residuals.
+        positive: Boolean. If True, the solution is constrained to positive values.
+        warm_start: Boolean. If True, the iterations start from the solution of the
+            previous fit.
+    """
+
+    def __init__(
+        self,
+        alpha=1.0,
+        rho=None,
+        max_iter=10000,
+        tol=1e-5,
+        positive=False,
+        warm_start=False,
+    ):
+        self.alpha = alpha
+        self.rho = rho
+        self.max_iter = max_iter
+        self.tol = tol
+        self.positive = positive
+        self.warm_start = warm_start
+
+        self.factor_ = None
+        self.rho_ = None
+        self._dual = None
+
+    def factorize(self, gram):
+        """Evaluate and cache the Cholesky factorization of the Gram matrix shifted by
+        the penalty parameter.
+
+        Args:
+            gram: A ndarray of shape (n_features, n_features), the Gram matrix,
+                :math:`{\\bf X}^T{\\bf X}`.
+        """
+        gram = np.asarray(gram)
+        rho = self.rho
+        if rho is None:
+            rho = max(np.mean(np.diag(gram)), np.finfo(float).eps)
+        shifted = gram + rho * np.identity(gram.shape[0])
+
+        self.factor_ = cho_factor(shifted, lower=True, check_finite=False)
+        self.rho_ = rho
+        self._dual = None
+        return self
+
+    def fit(self, X, y):
+        """Factorize the Gram matrix of X and fit the model.
+
+        Args:
+            X: A dense or sparse design matrix of shape (n_samples, n_features).
+            y: A ndarray of shape (n_samples,) or (n_samples, n_targets).
+        """
+        gram = X.T @ X
+        self.factorize(gram.toarray() if sparse.issparse(gram) else gram)
+        return self.solve(X.T @ y, X.shape[0])
+
+    def solve(self, Xy, n_samples, coef_init=None):
+        """Fit the model from the product, :math:`{\\bf X}^T{\\bf y}`, with the cached
+        factorization.
+
+        Args:
+            Xy: A ndarray of shape (n_features,) or (n_features, n_targets).
+            n_samples: The number of samples, :math:`N`, of the design matrix.
+            coef_init: A ndarray of shape (n_targets, n_features), the initial
+                solution, or None. The initial solution takes precedence over the
+                warm start.
+        """
+        Xy = np.asarray(Xy)
+        single = Xy.ndim == 1
+        Xy = Xy[:, np.newaxis] if single else Xy
+
+        rho = self.rho_
+        threshold = self.alpha * n_samples / rho
+        z, u = self._initial_state(Xy.shape, coef_init)
+
+        n_iter = self.max_iter
+        for i in range(self.max_iter):
+            w = cho_solve(self.factor_, Xy + rho * (z - u), check_finite=False)
+            z_old = z
+            z = _shrink(w + u, threshold, self.positive)
+            u = u + w - z
+
+            primal = np.linalg.norm(w - z)
+            dual = rho * np.linalg.norm(z - z_old)
+            if primal <= self.tol * max(np.linalg.norm(w), np.linalg.norm(z)) and (
+                dual <= self.tol * rho * np.linalg.norm(u)
+            ):
+                n_iter = i + 1
+                break
+
+        self._dual = u
+        self.coef_ = z[:, 0] if single or z.shape[1] == 1 else z.T
+        self.n_iter_ = n_iter
+        return self
+
+    def _initial_state(self, shape, coef_init=None):
+        """Return the initial solution and scaled dual variable."""
+        if coef_init is not None:
+            return np.reshape(coef_init, shape[::-1]).T.copy(), np.zeros(shape)
+        if self.warm_start and self._dual is not None and self._dual.shape == shape:
+            return self.coef_.T.reshape(shape), self._dual
+        return np.zeros(shape), np.zeros(shape)
+
+    def predict(self, X):
+        """Return the prediction, :math:`{\\bf Xw}`."""
+        return X @ self.coef_.T
+
+    def score(self, X, y, sample_weight=None):
+        """Return the coefficient of determination, :math:`R^2`, of the prediction."""
+        return r2_score(y, self.predict(X), sample_weight=sample_weight)
+
+
+def _shrink(x, threshold, positive):
+    """Return the soft-thresholding of x. If positive, the negative values are set to
+    zero."""
+    if positive:
+        return np.maximum(x - threshold, 0.0)
+    return np.sign(x) * np.maximum(np.abs(x) - threshold, 0.0)
@@ -1,21 +1,54 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 from copy import deepcopy
+from functools import reduce
+from itertools import islice
 
 import csdmpy as cp
 import numpy as np
+from joblib import cpu_count
 from joblib import delayed
+from joblib import effective_n_jobs
 from joblib import Parallel
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.linear_model import Lasso
+from sklearn.linear_model import lasso_path
 from sklearn.linear_model import LassoLars
 from sklearn.linear_model import MultiTaskLasso
-from sklearn.model_selection import cross_validate
 from sklearn.model_selection import KFold
+from threadpoolctl import threadpool_limits
 
-from mrinversion.linear_model.tsvd_compression import TSVDCompression  # noqa: F401
+from mrinversion.kernel.kronecker import KroneckerKernel
+from mrinversion.linear_model._admm import ADMMLasso
+from mrinversion.linear_model._fista import FISTALasso
+from mrinversion.linear_model._screening import gap_safe_fit
+from mrinversion.linear_model._screening import strong_rule_path
+from mrinversion.linear_model.tsvd_compression import _get_signal
+from mrinversion.linear_model.tsvd_compression import TSVDCompression
 
 __author__ = "Deepansh J. Srivastava"
 __email__ = "srivastava.89@osu.edu"
 
+# The methods that support the pathwise cross-validation.
+__path_methods__ = ("gradient_decent", "sparse", "gram", "admm", "fista")
+
+# The methods solved from the normal equations, with all columns of the signal batched.
+__batched_methods__ = ("admm", "fista")
+
+# The methods solved from the normal equations, which accept a KroneckerKernel.
+__factored_methods__ = ("gram", "admm", "fista")
+
+# The coordinate descent Lasso methods that support the screening.
+__screening_methods__ = ("gradient_decent", "sparse", "gram")
+
+# The joblib backends of the cross-validation.
+__backends__ = ("threading", "loky", "multiprocessing")
+
+# The hyperparameter search modes of the cross-validation.
+__searches__ = ("grid", "adaptive")
+
 
 class GeneralL2Lasso:
     r"""
@@ -50,7 +83,17 @@ class GeneralL2Lasso:
                      and `sparse ridge fusion`.
         f_shape: The shape of the solution, :math:`{\bf f}`, given as a tuple
                         (n1, n2, ..., nd)
+        screening: Boolean. If True, the columns of the kernel that are provably zero
+                   in the solution are discarded with the gap safe screening rule,
+                   before and periodically during the fit. The default is False.
+        snr_threshold: Float. If provided, only the columns of the signal with a
+                   signal-to-noise ratio of at least `snr_threshold` are solved, and
+                   the solution of the other columns is zero. The default is None.
     Attributes:
+        n_screened: The list of the number of discarded columns at every screening
+                    pass, or None.
+        snr: The ndarray of the signal-to-noise ratio of the columns of the signal,
+             or None.
     """
 
     def __init__(
@@ -63,6 +106,8 @@ class GeneralL2Lasso:
         regularizer=None,
         inverse_dimension=None,
         method="gradient_decent",
+        screening=False,
+        snr_threshold=None,
     ):
 
         self.hyperparameters = {"lambda": lambda1, "alpha": alpha}
@@ -73,10 +118,14 @@ class GeneralL2Lasso:
         self.inverse_dimension = inverse_dimension
         self.f_shape = tuple([item.count for item in inverse_dimension])[::-1]
         self.method = method
+        self.screening = screening
+        self.snr_threshold = snr_threshold
 
         # attributes
         self.f = None
         self.n_iter = None
+        self.n_screened = None
+        self.snr = None
 
     def fit(self, K, s):
         r"""
@@ -85,13 +134,23 @@ class GeneralL2Lasso:
         Args
         ----
 
-        K: ndarray
+        K: ndarray or KroneckerKernel
             The :math:`m \times n` kernel matrix, :math:`{\bf K}`. A numpy array of
-            shape (m, n).
+            shape (m, n), or a KroneckerKernel object. A KroneckerKernel is only
+            accepted with the `gram`, `admm`, and `fista` methods, which evaluate
+            the normal equations from the factors, without the dense kernel. With the
+            other methods, use the TSVDCompression class to compress a
+            KroneckerKernel before fitting.
         s: ndarray or CSDM object.
             A csdm object or an equivalent numpy array holding the signal,
             :math:`{\bf s}`, as a :math:`m \times m_\text{count}` matrix.
         """
+        self._fit(K, s)
+
+    def _fit(self, K, s, augmented=None, coef_init=None):
+        """Fit the model. `augmented` is the tuple of the augmented kernel and signal
+        of the problem, when already built, and `coef_init` is the initial solution
+        of the augmented problem, as an array of shape (m_count, n), or None."""
         if isinstance(s, cp.CSDM):
             self.s = s
             s_ = s.dependent_variables[0].components[0].T
@@ -100,6 +159,8 @@ class GeneralL2Lasso:
 
         if s_.ndim == 1:
             s_ = s_[:, np.newaxis]
+        _check_screening(self.screening, self.method)
+        _check_kernel(K, self.method)
         prod = np.asarray(self.f_shape).prod()
         if K.shape[1] != prod:
             raise ValueError(
@@ -108,18 +169,122 @@ class GeneralL2Lasso:
             )
 
         self.scale = s_.real.max()
-        Ks, ss = _get_augmented_data(
+        data = dict(
             K=K,
             s=s_ / self.scale,
             alpha=s_.size * self.hyperparameters["alpha"],
             regularizer=self.regularizer,
             f_shape=self.f_shape,
         )
+        if self.snr_threshold is None:
+            estimator = self._fit_estimator(data, augmented, coef_init)
+        else:
+            estimator = self._fit_signal_columns(data)
+        f = estimator.coef_.copy()
+        if s_.shape[1] > 1:
+            f.shape = (s_.shape[1],) + self.f_shape
+            f[:, :, 0] /= 2.0
+            f[:, 0, :] /= 2.0
+        else:
+            f.shape = self.f_shape
+            f[:, 0] /= 2.0
+            f[0, :] /= 2.0
+
+        f *= self.scale
+
+        if isinstance(s, cp.CSDM):
+            f = cp.as_csdm(f)
+
+            if len(s.dimensions) > 1:
+                f.dimensions[2] = s.dimensions[1]
+            f.dimensions[1] = self.inverse_dimension[1]
+            f.dimensions[0] = self.inverse_dimension[0]
 
+        self.estimator = estimator
+        self.f = f
+        self.n_iter = estimator.n_iter_
+
+    def _fit_signal_columns(self, data):
+        """Return the estimator fitted to the columns of the signal with the
+        signal-to-noise ratio of at least `snr_threshold`. The solution of the other
+        columns is set to zero without calling the solver."""
+        s_ = data["s"]
+        self.snr = _column_snr(s_)
+        index = np.flatnonzero(self.snr >= self.snr_threshold)
+        if index.size == s_.shape[1]:
+            return self._fit_estimator(data)
+
+        coef = np.zeros((s_.shape[1], data["K"].shape[1]))
+        if index.size == 0:
+            estimator = self._get_estimator()
+            estimator.n_iter_ = 0
+        else:
+            # the alpha of data is not changed, such that the solution of every
+            # solved column is identical to the solution from the complete signal.
+            estimator = self._fit_estimator({**data, "s": s_[:, index]})
+            coef[index] = estimator.coef_.reshape(index.size, -1)
+
+        estimator.coef_ = coef[0] if s_.shape[1] == 1 else coef
+        estimator.intercept_ = 0.0
+        return estimator
+
+    def _fit_estimator(self, data, augmented=None, coef_init=None):
+        """Return the estimator of the method fitted to the augmented problem, where
+        `data` is the dict of the arguments of the augmented data functions.
+        `augmented` is the tuple of the already built augmented kernel and signal, or
+        None, and `coef_init` is the initial solution, or None."""
+        if self.method in __batched_methods__:
+            if augmented is None:
+                gram, b, n_samples = _get_normal_equations(**data)
+            else:
+                gram, b, n_samples = _get_augmented_normal_equations(*augmented)
+            estimator = self._get_estimator().factorize(gram)
+            return estimator.solve(b, n_samples, coef_init=coef_init)
+
+        Ks, ss, precompute = self._get_design(data, augmented)
+        estimator = self._get_estimator(precompute)
+        if coef_init is not None and self.method != "lars":
+            estimator.set_params(warm_start=True)
+            estimator.coef_ = coef_init
+        if not self.screening:
+            return estimator.fit(Ks, ss)
+
+        estimator, self.n_screened = gap_safe_fit(estimator, Ks, ss)
+        return estimator
+
+    def _get_design(self, data, augmented=None):
+        """Return the design, the target, and the precomputed Gram matrix, or False,
+        of the method. The design and the target are the already built augmented
+        kernel and signal, `augmented`, when given."""
+        if augmented is not None:
+            Ks, ss = augmented
+            precompute = False
+            if self.method == "gram":
+                precompute = np.asarray(Ks.T @ Ks)
+            return Ks, ss, precompute
+
+        if self.method == "gram":
+            return _get_gram_data(**data)
+
+        Ks, ss = _get_augmented_data(**data, sparse_kernel=self.method == "sparse")
+        return Ks, ss, False
+
+    def _get_estimator(self, precompute=False):
+        """Return the estimator for the method. `precompute` is the precomputed Gram
+        matrix of the design, or False."""
         # The factor 0.5 for alpha in the Lasso/LassoLars problem is to compensate
         # 1/(2 * n_sample) factor in OLS term
+        if self.method in __batched_methods__:
+            estimator = ADMMLasso if self.method == "admm" else FISTALasso
+            return estimator(
+                alpha=self.hyperparameters["lambda"] / 2.0,
+                max_iter=self.max_iterations,
+                tol=self.tolerance,
+                positive=self.positive,
+            )
+
         if self.method == "multi-task":
-            estimator = MultiTaskLasso(
+            return MultiTaskLasso(
                 alpha=self.hyperparameters["lambda"] / 2.0,
                 fit_intercept=False,
                 copy_X=True,
@@ -131,10 +296,11 @@ class GeneralL2Lasso:
                 # positive=self.positive,
             )
 
-        if self.method == "gradient_decent":
-            estimator = Lasso(
+        if self.method in ["gradient_decent", "sparse", "gram"]:
+            return Lasso(
                 alpha=self.hyperparameters["lambda"] / 2.0,
                 fit_intercept=False,
+                precompute=precompute,
                 copy_X=True,
                 max_iter=self.max_iterations,
                 tol=self.tolerance,
@@ -145,7 +311,7 @@ class GeneralL2Lasso:
             )
 
         if self.method == "lars":
-            estimator = LassoLars(
+            return LassoLars(
                 alpha=self.hyperparameters["lambda"] / 2.0,
                 fit_intercept=False,
                 verbose=True,
@@ -160,31 +326,6 @@ class GeneralL2Lasso:
                 random_state=None,
             )
 
-        estimator.fit(Ks, ss)
-        f = estimator.coef_.copy()
-        if s_.shape[1] > 1:
-            f.shape = (s_.shape[1],) + self.f_shape
-            f[:, :, 0] /= 2.0
-            f[:, 0, :] /= 2.0
-        else:
-            f.shape = self.f_shape
-            f[:, 0] /= 2.0
-            f[0, :] /= 2.0
-
-        f *= self.scale
-
-        if isinstance(s, cp.CSDM):
-            f = cp.as_csdm(f)
-
-            if len(s.dimensions) > 1:
-                f.dimensions[2] = s.dimensions[1]
-            f.dimensions[1] = self.inverse_dimension[1]
-            f.dimensions[0] = self.inverse_dimension[0]
-
-        self.estimator = estimator
-        self.f = f
-        self.n_iter = estimator.n_iter_
-
     def predict(self, K):
         r"""
         Predict the signal using the linear model.
@@ -192,19 +333,33 @@ class GeneralL2Lasso:
         Args
         ----
 
-        K: ndarray
+        K: ndarray or TSVDCompression
             A :math:`m \times n` kernel matrix, :math:`{\bf K}`. A numpy array of shape
-            (m, n).
+            (m, n). If the model is fitted to a compressed problem, the
+            TSVDCompression object of the problem, with which the prediction is
+            expanded from the compressed prediction, :math:`{\bf U}_r \tilde{\bf K}
+            {\bf f^*}`, without the full kernel.
 
         Return
         ------
         ndarray
             A numpy array of shape (m, m_count) with the predicted values
         """
-        predict = self.estimator.predict(K) * self.scale
+        predict = self._predict(K) * self.scale
 
         return predict
 
+    def _predict(self, K):
+        """Return the product of the kernel and the unscaled solution. The product
+        with a KroneckerKernel is evaluated from its factors, and the product with a
+        TSVDCompression is expanded from the compressed product."""
+        if isinstance(K, TSVDCompression):
+            predict = self.estimator.predict(K.compressed_K)
+            return K.compressor.projected_signal(predict)
+        if isinstance(K, KroneckerKernel):
+            return K.matvec(self.estimator.coef_.T)
+        return self.estimator.predict(K)
+
     def residuals(self, K, s):
         r"""
         Return the residual as the difference the data and the prediced data(fit),
@@ -217,9 +372,10 @@ class GeneralL2Lasso:
 
         Args
         ----
-        K: ndarray.
+        K: ndarray or TSVDCompression.
             A :math:`m \times n` kernel matrix, :math:`{\bf K}`. A numpy array of shape
-            (m, n).
+            (m, n). If the model is fitted to a compressed problem, the
+            TSVDCompression object of the problem. See the :meth:`predict` method.
         s: ndarray ot CSDM object.
             A csdm object or a :math:`m \times m_\text{count}` signal matrix,
             :math:`{\bf s}`.
@@ -235,7 +391,7 @@ class GeneralL2Lasso:
             s_ = s.dependent_variables[0].components[0].T
         else:
             s_ = s
-        predict = np.squeeze(self.estimator.predict(K)) * self.scale
+        predict = np.squeeze(self._predict(K)) * self.scale
         residue = s_ - predict
 
         if not isinstance(s, cp.CSDM):
@@ -252,6 +408,61 @@ class GeneralL2Lasso:
         """
         return self.estimator.score(K, s / self.scale, sample_weights)
 
+    def residual_norm(self, compression):
+        r"""
+        Return the residual norm of every column of the signal, evaluated from the
+        compressed problem as
+
+        .. math::
+            \|{\bf s - Kf^*}\|_2 = \left(\|\tilde{\bf s} - \tilde{\bf K}{\bf f^*}
+                \|_2^2 + \|{\bf s}_\perp\|_2^2\right)^{1/2},
+
+        where :math:`{\bf s}_\perp` is the part of the signal outside the range of
+        the retained left singular vectors, stored in the compression. The cost is
+        :math:`O(r \, m_\text{count})`, independent of the size of the signal. The
+        kernel is approximated by its truncated decomposition.
+
+        Args:
+            compression: The TSVDCompression object of the compressed problem, to
+                which the model is fitted.
+        """
+        s_tilde = _get_signal(compression.compressed_s)
+        s_tilde = s_tilde.reshape(s_tilde.shape[0], -1)
+        predict = self._predict(compression.compressed_K) * self.scale
+        inside = (np.abs(s_tilde - predict.reshape(s_tilde.shape)) ** 2).sum(axis=0)
+        outside = np.ravel(compression.out_of_subspace_norm) ** 2
+        return np.sqrt(inside + outside)
+
+    def chi_squared(self, compression, sigma):
+        r"""
+        Return the :math:`\chi^2` of the fit, :math:`\|{\bf s - Kf^*}\|_2^2 /
+        \sigma^2`, evaluated from the compressed problem. See the
+        :meth:`residual_norm` method.
+
+        Args:
+            compression: The TSVDCompression object of the compressed problem, to
+                which the model is fitted.
+            sigma: The standard deviation of the noise in the signal, as a float or
+                a ndarray of the standard deviation of every column of the signal.
+        """
+        residual = self.residual_norm(compression) ** 2
+        return float((residual / np.ravel(sigma) ** 2).sum())
+
+    def compressed_score(self, compression):
+        """
+        Return the coefficient of determination, :math:`R^2`, of the prediction of
+        the signal, evaluated from the compressed problem. The :math:`R^2` is the
+        uniform average over the columns of the signal, as the :meth:`score` method.
+        See the :meth:`residual_norm` method.
+
+        Args:
+            compression: The TSVDCompression object of the compressed problem, to
+                which the model is fitted.
+        """
+        residual = self.residual_norm(compression) ** 2
+        total = np.ravel(compression.total_sum_of_squares)
+        return float(np.mean(1.0 - residual / total))
+
 
 class GeneralL2LassoCV:
     def __init__(
@@ -270,8 +481,26 @@ class GeneralL2LassoCV:
         inverse_dimension=None,
         n_jobs=-1,
         method="gradient_decent",
+        pathwise=False,
+        backend="threading",
+        blas_threads=None,
+        screening=False,
+        search="grid",
+        budget=None,
+        keep_solutions=False,
     ):
 
+        if backend not in __backends__:
+            raise ValueError(
+                f"`{backend}` is an invalid backend. The allowed values are "
+                f"{__backends__}."
+            )
+        if search not in __searches__:
+            raise ValueError(
+                f"`{search}` is an invalid search. The allowed values are "
+                f"{__searches__}."
+            )
+
         if alphas is None:
             self.cv_alphas = 10 ** ((np.arange(5) / 4) * 2 - 4)[::-1]
         else:
@@ -283,9 +512,17 @@ class GeneralL2LassoCV:
             self.cv_lambdas = np.asarray(lambdas).ravel()
 
         self.method = method
+        self.pathwise = pathwise
+        self.screening = screening
+        self.search = search
+        self.budget = budget
+        self.keep_solutions = keep_solutions
+        self.cv_solutions = None
         self.folds = folds
 
         self.n_jobs = n_jobs
+        self.backend = backend
+        self.blas_threads = blas_threads
         self.max_iterations = max_iterations
         self.tolerance = tolerance
         self.positive = positive
@@ -319,6 +556,13 @@ class GeneralL2LassoCV:
             s_ = s
 
         s_ = s_[:, np.newaxis] if s_.ndim == 1 else s_
+        if self.pathwise and self.method not in __path_methods__:
+            raise ValueError(
+                "The pathwise cross-validation is only applicable to the methods "
+                f"{__path_methods__}."
+            )
+        _check_screening(self.screening, self.method)
+        _check_kernel(K, self.method, cross_validation=True)
         prod = np.asarray(self.f_shape).prod()
         if K.shape[1] != prod:
             raise ValueError(
@@ -336,49 +580,34 @@ class GeneralL2LassoCV:
             random=self.randomize,
             times=self.times,
         )
-        self.cv_map = np.zeros((self.cv_alphas.size, self.cv_lambdas.size))
-
         alpha_ratio = np.ones(self.cv_alphas.size)
         if self.cv_alphas.size != 1 and self.cv_alphas[0] != 0:
             alpha_ratio[1:] = np.sqrt(self.cv_alphas[1:] / self.cv_alphas[:-1])
 
+        # the alpha of the regularization rows of the augmented kernel.
+        alpha_ref = self.cv_alphas[0]
         Ks, ss = _get_augmented_data(
             K=K,
             s=s_,
-            alpha=s_.size * self.cv_alphas[0],
+            alpha=s_.size * alpha_ref,
             regularizer=self.regularizer,
             f_shape=self.f_shape,
+            sparse_kernel=self.method == "sparse",
         )
         start_index = K.shape[0]
+        self._best_solution = None
 
-        l1 = self._get_minimizer()
-        # l1.fit(Ks, ss)
-
-        l1_array = []
-        for lambda_ in self.cv_lambdas:
-            l1_array.append(deepcopy(l1))
-            l1_array[-1].alpha = lambda_ / 2.0
-
-        j = 0
-        for alpha_ratio_ in alpha_ratio:
-            if alpha_ratio_ != 0:
-                Ks[start_index:] *= alpha_ratio_
-            jobs = (
-                delayed(cv)(l1_array[i], Ks, ss, cv_indexes)
-                for i in range(self.cv_lambdas.size)
+        if self.search == "adaptive":
+            self.cv_map, self.n_screened, solutions = self._adaptive_search(
+                Ks, ss, cv_indexes, start_index
             )
-            self.cv_map[j] = Parallel(
-                n_jobs=self.n_jobs,
-                verbose=self.verbose,
-                **{
-                    "backend": {
-                        "threads": "threading",
-                        "processes": "multiprocessing",
-                        None: None,
-                    }["threads"]
-                },
-            )(jobs)
-            j += 1
+        else:
+            # the scaling of the regularization rows of Ks for every alpha.
+            factors = np.cumprod(alpha_ratio)
+            self.cv_map, self.n_screened, solutions = self._cv_grid(
+                Ks, ss, cv_indexes, start_index, factors, self.cv_lambdas
+            )
+            self.n_evaluations = self.cv_map.size
 
         # cv_map contains negated mean square errors, therefore multiply by -1.
         self.cv_map *= -1
@@ -391,24 +620,23 @@ class GeneralL2LassoCV:
         self.cv_map = np.abs(self.cv_map)
 
         # The argmin of the minimum value is the selected model as it has the least
-        # prediction error.
-        index = np.unravel_index(self.cv_map.argmin(), self.cv_map.shape)
+        # prediction error. The cells not evaluated by the adaptive search are NaN.
+        index = np.unravel_index(np.nanargmin(self.cv_map), self.cv_map.shape)
         self.hyperparameters["alpha"] = self.cv_alphas[index[0]]
         self.hyperparameters["lambda"] = self.cv_lambdas[index[1]]
 
+        if self.keep_solutions:
+            self.cv_solutions = self._get_solutions(solutions)
+            coef_init = solutions[index]
+        else:
+            # the best mean solution of the folds, streamed from the tasks, or a cold
+            # start for the gram method.
+            best, self._best_solution = self._best_solution, None
+            coef_init = None if best is None else best[1]
+
         # Calculate the solution using the complete data at the optimized lambda and
-        # alpha values
-        self.opt = GeneralL2Lasso(
-            alpha=self.hyperparameters["alpha"],
-            lambda1=self.hyperparameters["lambda"],
-            max_iterations=self.max_iterations,
-            tolerance=self.tolerance,
-            positive=self.positive,
-            regularizer=self.regularizer,
-            inverse_dimension=self.inverse_dimension,
-            method=self.method,
-        )
-        self.opt.fit(K, s)
+        # alpha values, warm-started from the mean solution of the folds.
+        self._refit(K, s, (Ks, ss, start_index, alpha_ref), coef_init)
         self.f = self.opt.f
 
         # convert cv_map to csdm
@@ -426,10 +654,276 @@ class GeneralL2LassoCV:
         else:
             self.cv_map.dimensions[0] = d1
 
+    def _refit(self, K, s, augmented, coef_init):
+        """Fit the model of the selected hyperparameters to the complete data from the
+        initial solution, `coef_init`. `augmented` is the tuple of the augmented
+        kernel and signal of the cross-validation, the index of the first
+        regularization row, and the alpha of the regularization rows. The rows are
+        rescaled in-place to the selected alpha and reused for the fit. The `gram`
+        method is fitted from the normal equations of K instead."""
+        Ks, ss, start, alpha_ref = augmented
+        augmented = None
+        if alpha_ref > 0 and self.method != "gram":
+            factor = np.sqrt(self.hyperparameters["alpha"] / alpha_ref)
+            Ks = Ks if factor == 1 else _scale_rows(Ks, start, factor)
+            augmented = (Ks, ss)
+
+        self.opt = GeneralL2Lasso(
+            alpha=self.hyperparameters["alpha"],
+            lambda1=self.hyperparameters["lambda"],
+            max_iterations=self.max_iterations,
+            tolerance=self.tolerance,
+            positive=self.positive,
+            regularizer=self.regularizer,
+            inverse_dimension=self.inverse_dimension,
+            method=self.method,
+            screening=self.screening,
+        )
+        self.opt._fit(K, s, augmented, coef_init)
+
+    def _get_solutions(self, solutions):
+        """Return the mean solutions of the folds, of shape (alphas, lambdas,
+        n_targets, n_features), as an array of shape (alphas, lambdas, m_count,
+        nd, ..., n1, n0) scaled as the solution, f."""
+        f = solutions.reshape(solutions.shape[:3] + self.f_shape) * self.scale
+        f[..., 0] /= 2.0
+        f[..., 0, :] /= 2.0
+        return f
+
+    def _adaptive_search(self, Ks, ss, cv_indexes, start):
+        """Return the cross-validation scores, the mean number of screened columns,
+        and the mean solutions of the coarse-to-fine search, on the grid of all
+        evaluated alphas and lambdas, where the cells that are not evaluated are NaN.
+        The alphas and lambdas of the grid replace `cv_alphas` and `cv_lambdas`.
+
+        The search starts with a 3 x 3 grid spanning the log range of the alphas and
+        lambdas. Every following 3 x 3 grid is centered at the current minimum of the
+        cross-validation error, with half the log step of the previous grid, until
+        the next grid exceeds the budget of (alpha, lambda) evaluations. The points
+        of a grid that are already evaluated are not counted against the budget.
+        """
+        hyperparameters = (self.cv_alphas, self.cv_lambdas)
+        if min([item.min() for item in hyperparameters]) <= 0:
+            raise ValueError(
+                "The adaptive search requires positive alphas and lambdas."
+            )
+        budget = self.budget
+        if budget is None:
+            budget = max(self.cv_alphas.size * self.cv_lambdas.size // 2, 9)
+
+        bounds = [np.log10([item.min(), item.max()]) for item in hyperparameters]
+        centers = [item.mean() for item in bounds]
+        steps = [(item[1] - item[0]) / 2.0 for item in bounds]
+
+        scores, self.n_evaluations = {}, 0
+        while max(steps) > 1e-3 or not scores:
+            log_alphas, log_lambdas = [
+                np.unique(np.round(np.clip(c + h * np.arange(-1, 2), *b), 10))[::-1]
+                for c, h, b in zip(centers, steps, bounds)
+            ]
+            # the points of the previous grids are not evaluated again.
+            pairs = [
+                (a, b) for a in log_alphas for b in log_lambdas if (a, b) not in scores
+            ]
+            if scores and self.n_evaluations + len(pairs) > budget:
+                break
+
+            self._score_pairs(Ks, ss, cv_indexes, start, pairs, scores)
+            self.n_evaluations += len(pairs)
+
+            # the negated mean square error is maximum at the best point.
+            centers = max(scores, key=lambda key: scores[key][0])
+            steps = [item / 2.0 for item in steps]
+
+        return self._scattered_grid(scores)
+
+    def _score_pairs(self, Ks, ss, cv_indexes, start, pairs, scores):
+        """Add the cross-validation scores, the mean number of screened columns, and
+        the mean solutions of the list of (log alpha, log lambda) pairs to the dict,
+        `scores`. The alphas with the same lambdas are evaluated on a single grid."""
+        rows = {}
+        for a, b in pairs:
+            rows.setdefault(a, []).append(b)
+        grids = {}
+        for a, log_lambdas in rows.items():
+            grids.setdefault(tuple(log_lambdas), []).append(a)
+
+        for log_lambdas, log_alphas in grids.items():
+            factors = np.sqrt(10 ** np.asarray(log_alphas) / self.cv_alphas[0])
+            lambdas = 10 ** np.asarray(log_lambdas)
+            grid = self._cv_grid(Ks, ss, cv_indexes, start, factors, lambdas)
+            for i, a in enumerate(log_alphas):
+                for j, b in enumerate(log_lambdas):
+                    scores[(a, b)] = tuple(
+                        None if item is None else item[i, j] for item in grid
+                    )
+
+    def _scattered_grid(self, scores):
+        """Return the cross-validation scores, the mean number of screened columns,
+        and the mean solutions from the dict of the evaluated (log alpha, log lambda)
+        points, on the grid of the evaluated alphas and lambdas, in the descending
+        order. The cells that are not evaluated are NaN. The solutions are None when
+        they are not kept."""
+        log_alphas, log_lambdas = [
+            np.unique([key[i] for key in scores])[::-1] for i in range(2)
+        ]
+        shape = (log_alphas.size, log_lambdas.size)
+        values = next(iter(scores.values()))
+        grid = [
+            None if item is None else np.full(shape + np.shape(item), np.nan)
+            for item in values
+        ]
+        for (a, b), values in scores.items():
+            index = (
+                np.flatnonzero(log_alphas == a)[0],
+                np.flatnonzero(log_lambdas == b)[0],
+            )
+            for item, value in zip(grid, values):
+                if item is not None:
+                    item[index] = value
+
+        self.cv_alphas, self.cv_lambdas = 10 ** log_alphas, 10 ** log_lambdas
+        return grid
+
+    def _cv_grid(self, Ks, ss, cv_indexes, start, factors, lambdas):
+        """Return the cross-validation scores, as negative of mean square error, the
+        mean number of screened columns, and the mean solutions, of shape
+        (n_targets, n_features), over the folds, on the grid of the alphas, given as
+        the factors, and the lambdas. The solutions are None when `keep_solutions` is
+        False, in which case only the best mean solution is kept for the warm start.
+
+        The grid is flattened into independent (alpha, lambda, fold) tasks, or
+        (alpha, fold) tasks for the pathwise cross-validation and the batched
+        methods. Every task shares the read-only augmented kernel, Ks, of the first
+        alpha, and scales the regularization rows, from index `start`, of its train
+        set by the factor of its alpha. The `gram` method evaluates one task per
+        fold, which caches the normal equations of the fold and updates the Gram
+        matrix for every alpha. The `gram` tasks return the solutions only when
+        `keep_solutions` is True.
+        """
+        folds = len(cv_indexes)
+        shape = (factors.size, lambdas.size)
+
+        if self.method == "gram":
+            params = dict(
+                max_iter=self.max_iterations, tol=self.tolerance, positive=self.positive
+            )
+            smooth = Ks[start:].T @ Ks[start:]
+            args = (factors, lambdas / 2.0, smooth, params, self.screening)
+            tasks = [
+                (train, test, start, *args, self.keep_solutions)
+                for train, test in cv_indexes
+            ]
+            result = self._run_tasks(cv_gram, Ks, ss, tasks)
+            return self._reduce_folds(result, folds, shape)
+
+        if self.pathwise or self.method in __batched_methods__:
+            alphas = lambdas / 2.0
+            if self.method in __batched_methods__:
+                func, args = cv_batched, (alphas, self._get_minimizer(), True)
+            else:
+                params = dict(
+                    max_iter=self.max_iterations,
+                    tol=self.tolerance,
+                    positive=self.positive,
+                )
+                func, args = cv_path, (alphas, params, self.screening, True)
+            tasks = [
+                (train, test, start, factor, *args)
+                for factor in factors
+                for train, test in cv_indexes
+            ]
+            result = self._run_tasks(func, Ks, ss, tasks)
+            return self._reduce_folds(result, folds, shape)
+
+        l1 = self._get_minimizer()
+        tasks = [
+            (train, test, start, factor, l1, lambda_ / 2.0, self.screening, True)
+            for factor in factors
+            for lambda_ in lambdas
+            for train, test in cv_indexes
+        ]
+        result = self._run_tasks(cv, Ks, ss, tasks)
+        return self._reduce_folds(result, folds, shape)
+
+    def _reduce_folds(self, result, folds, shape):
+        """Return the negated mean square errors, the mean numbers of screened
+        columns, and the mean solutions over the folds, on the grid of the given
+        shape, from the stream of the task results, where every consecutive `folds`
+        results are the folds of a block of the grid. The mean solutions are None
+        when `keep_solutions` is False, and the mean solution of the block with the
+        least cross-validation error updates the best solution instead, such that
+        only the solutions of the folds of one block are held in memory."""
+        mse, screened, solutions = [], [], []
+        for block in iter(lambda: list(islice(result, folds)), []):
+            block_mse, block_screened, block_solutions = _fold_mean(
+                block, (folds,), 0
+            )
+            mse.append(block_mse)
+            screened.append(block_screened)
+            if self.keep_solutions:
+                solutions.append(block_solutions)
+            elif block_solutions is not None:
+                self._update_best_solution(block_mse, block_solutions)
+
+        mse, screened = np.reshape(mse, shape), np.reshape(screened, shape)
+        if not self.keep_solutions:
+            return -mse, screened, None
+        solutions = np.reshape(solutions, shape + solutions[0].shape[-2:])
+        return -mse, screened, solutions
+
+    def _update_best_solution(self, mse, solutions):
+        """Replace the best mean solution of the folds, `best_solution`, with the
+        mean solution of the least cross-validation error, |mse - sigma^2|, from the
+        block of mean square errors, `mse`, and the mean solutions of the block."""
+        error = np.abs(np.ravel(mse) - self.sigma ** 2)
+        index = np.nanargmin(error)
+        if self._best_solution is None or error[index] < self._best_solution[0]:
+            solutions = solutions.reshape((-1,) + solutions.shape[-2:])
+            self._best_solution = (error[index], solutions[index].copy())
+
+    def _run_tasks(self, func, Ks, ss, tasks):
+        """Yield func(Ks, ss, *task) for every task, in the order of the tasks, as
+        the tasks are evaluated in parallel with the backend. The number of BLAS
+        threads is limited to avoid the oversubscription of the processors. With the
+        process backends, Ks and ss are dumped once to memory-mapped files shared by
+        the workers."""
+        limits = self.blas_threads
+        if limits is None:
+            limits = max(1, cpu_count() // effective_n_jobs(self.n_jobs))
+
+        parallel = Parallel(
+            n_jobs=self.n_jobs,
+            verbose=self.verbose,
+            backend=self.backend,
+            return_as="generator",
+        )
+        if self.backend == "threading":
+            with threadpool_limits(limits=limits):
+                yield from parallel(delayed(func)(Ks, ss, *task) for task in tasks)
+            return
+
+        with tempfile.TemporaryDirectory() as folder:
+            Ks = _memmap(Ks, folder, "K")
+            ss = _memmap(ss, folder, "s")
+            yield from parallel(
+                delayed(_limited)(limits, func, Ks, ss, *task) for task in tasks
+            )
+
     def _get_minimizer(self):
         """Return the estimator for the method"""
         # The factor 0.5 for alpha in the Lasso/LassoLars problem is to compensate
         # 1/(2 * n_sample) factor in OLS term.
+        if self.method in __batched_methods__:
+            estimator = ADMMLasso if self.method == "admm" else FISTALasso
+            return estimator(
+                alpha=self.cv_lambdas[0] / 2.0,
+                max_iter=self.max_iterations,
+                tol=self.tolerance,
+                positive=self.positive,
+                warm_start=True,
+            )
+
         if self.method == "multi-task":
             return MultiTaskLasso(
                 alpha=self.cv_lambdas[0] / 2.0,
@@ -445,12 +939,12 @@ class GeneralL2LassoCV:
                 selection="random",
             )
 
-        if self.method == "gradient_decent":
+        if self.method in ["gradient_decent", "sparse", "gram"]:
             return Lasso(
                 alpha=self.cv_lambdas[0] / 2.0,
                 fit_intercept=False,
                 normalize=False,
-                precompute=True,
+                precompute=self.method != "sparse",
                 max_iter=self.max_iterations,
                 tol=self.tolerance,
                 copy_X=True,
@@ -517,6 +1011,39 @@ class GeneralL2LassoCV:
         """
         return self.opt.score(K, s, sample_weights)
 
+    def residual_norm(self, compression):
+        """
+        Return the residual norm of every column of the signal, evaluated from the
+        compressed problem.
+
+        Args:
+            compression: The TSVDCompression object of the compressed problem, to
+                which the model is fitted.
+        """
+        return self.opt.residual_norm(compression)
+
+    def chi_squared(self, compression, sigma):
+        r"""
+        Return the :math:`\chi^2` of the fit, evaluated from the compressed problem.
+
+        Args:
+            compression: The TSVDCompression object of the compressed problem, to
+                which the model is fitted.
+            sigma: The standard deviation of the noise in the signal.
+        """
+        return self.opt.chi_squared(compression, sigma)
+
+    def compressed_score(self, compression):
+        """
+        Return the coefficient of determination, :math:`R^2`, of the prediction,
+        evaluated from the compressed problem.
+
+        Args:
+            compression: The TSVDCompression object of the compressed problem, to
+                which the model is fitted.
+        """
+        return self.opt.compressed_score(compression)
+
     @property
     def cross_validation_curve(self):
         """The cross-validation error metric determined as the mean square error.
@@ -526,24 +1053,255 @@ class GeneralL2LassoCV:
         return self.cv_map
 
 
-def cv(l1, X, y, cv):
-    """Return the cross-validation score as negative of mean square error."""
-    if isinstance(l1, (Lasso, MultiTaskLasso)):
+def cv(X, y, train, test, start, factor, l1, alpha, screening=False, solutions=True):
+    """Return the mean square error of the test set for the estimator, l1, at the
+    given alpha, fitted on the train set, along with the number of columns discarded
+    by the gap safe screening when `screening` is True, and the solution of shape
+    (n_targets, n_features), or None if `solutions` is False. The regularization
+    rows of X, from index `start`, are scaled by `factor`."""
+    X_train, y_train, X_test, y_test = _get_fold_data(X, y, train, test, start, factor)
+
+    l1 = clone(l1).set_params(alpha=alpha)
+    fit_params = {}
+    if isinstance(l1, Lasso) and not isinstance(l1, MultiTaskLasso):
         fit_params = {"check_input": False}
-    if isinstance(l1, LassoLars):
-        fit_params = None  # {"Xy": np.dot(X.T, y)}
-
-    cv_score = cross_validate(
-        l1,
-        X=X,
-        y=y,
-        scoring="neg_mean_squared_error",  # 'neg_mean_absolute_error",
-        cv=cv,
-        fit_params=fit_params,
-        n_jobs=1,
-        verbose=0,
-    )
-    return cv_score["test_score"].mean()
+
+    screened = 0
+    if screening:
+        l1, screened = gap_safe_fit(l1, X_train, y_train)
+        screened = screened[-1]
+    else:
+        l1.fit(X_train, y_train, **fit_params)
+    residue = y_test - l1.predict(X_test).reshape(y_test.shape)
+    coef = np.reshape(l1.coef_, (y.shape[1], -1)) if solutions else None
+    return np.mean(residue ** 2), screened, coef
+
+
+def cv_path(
+    X, y, train, test, start, factor, alphas, params, screening=False, solutions=True
+):
+    """Return the mean square errors of the test set for the list of Lasso alphas,
+    evaluated along the warm-started lasso path of the train set, along with the
+    mean number of columns discarded by the sequential strong rule at every alpha
+    when `screening` is True, and the solutions of shape (alphas.size, n_targets,
+    n_features), or None if `solutions` is False. The Gram matrix of a dense train
+    set is computed once and reused over the path. The regularization rows of X,
+    from index `start`, are scaled by `factor`."""
+    X_train, y_train, X_test, y_test = _get_fold_data(X, y, train, test, start, factor)
+
+    gram = False if sparse.issparse(X) else X_train.T @ X_train
+
+    # lasso_path evaluates the alphas in the decreasing order.
+    order = np.argsort(alphas)[::-1]
+    mse = np.zeros(alphas.size)
+    screened = np.zeros(alphas.size)
+    coef = np.zeros((alphas.size, y.shape[1], X.shape[1])) if solutions else None
+    for j in range(y.shape[1]):
+        Xy = None if gram is False else X_train.T @ y_train[:, j]
+        if screening:
+            coefs, count = strong_rule_path(
+                X_train, y_train[:, j], alphas[order], gram, Xy, params
+            )
+            screened[order] += count
+        else:
+            _, coefs, _ = lasso_path(
+                X_train,
+                y_train[:, j],
+                alphas=alphas[order],
+                precompute=gram,
+                Xy=Xy,
+                **params,
+            )
+        residue = y_test[:, j : j + 1] - X_test @ coefs
+        mse[order] += (residue ** 2).sum(axis=0)
+        if solutions:
+            coef[order, j] = coefs.T
+    return mse / y_test.size, screened / y.shape[1], coef
+
+
+def cv_gram(
+    X, y, train, test, start, factors, alphas, smooth, params, screening, solutions
+):
+    """Return the mean square errors of the test set on the grid of the alpha
+    factors and the Lasso alphas, evaluated from the normal equations of the train
+    set, along with the mean number of columns discarded by the sequential strong
+    rule when `screening` is True, and the solutions of shape (factors.size,
+    alphas.size, n_targets, n_features), or None if `solutions` is False.
+
+    The Gram matrix and the product with the target of the kernel rows of the train
+    set are computed once. The Gram matrix of every factor is updated as
+    gram + factor**2 * smooth, where smooth is the Gram matrix of the regularization
+    rows of X, from index `start`, and the alphas are fitted along the warm-started
+    lasso path without the train set."""
+    train = np.asarray(train)
+    rows = train[train < start]
+    X_rows = X[rows]
+    gram_K, Xy = X_rows.T @ X_rows, X_rows.T @ y[rows]
+    design = _gram_design(train.size, X.shape[1])
+    X_test, y_test = X[test], y[test]
+
+    # lasso_path evaluates the alphas in the decreasing order.
+    order = np.argsort(alphas)[::-1]
+    shape = (factors.size, alphas.size)
+    mse, screened = np.zeros(shape), np.zeros(shape)
+    coef = np.zeros(shape + (y.shape[1], X.shape[1])) if solutions else None
+    for i, factor in enumerate(factors):
+        gram = np.ascontiguousarray(gram_K + factor ** 2 * smooth)
+        for j in range(y.shape[1]):
+            args = (y[rows, j], alphas[order], gram, np.ascontiguousarray(Xy[:, j]))
+            if screening:
+                coefs, count = strong_rule_path(design, *args, params)
+                screened[i, order] += count
+            else:
+                _, coefs, _ = lasso_path(
+                    design,
+                    args[0],
+                    alphas=args[1],
+                    precompute=gram,
+                    Xy=args[3],
+                    check_input=False,
+                    **params,
+                )
+            residue = y_test[:, j : j + 1] - X_test @ coefs
+            mse[i, order] += (residue ** 2).sum(axis=0)
+            if solutions:
+                coef[i, order, j] = coefs.T
+    return mse / y_test.size, screened / y.shape[1], coef
+
+
+def _gram_design(n_samples, n_features):
+    """Return a zero-stride placeholder of the design of shape (n_samples,
+    n_features). The lasso path only uses the shape and the data type of the design
+    when the Gram matrix and Xy are given with check_input=False."""
+    return np.broadcast_to(np.float64(0.0), (n_samples, n_features))
+
+
+def cv_batched(X, y, train, test, start, factor, alphas, l1, solutions=True):
+    """Return the mean square errors of the test set for the list of Lasso alphas,
+    evaluated with the batched estimator, l1, on the train set, along with the zero
+    number of screened columns, and the solutions of shape (alphas.size, n_targets,
+    n_features), or None if `solutions` is False. The Gram matrix of the train set
+    is factorized once and reused for every alpha, from the largest to the smallest
+    alpha, with warm starts. The regularization rows of X, from index `start`, are
+    scaled by `factor`."""
+    X_train, y_train, X_test, y_test = _get_fold_data(X, y, train, test, start, factor)
+
+    gram = X_train.T @ X_train
+    l1 = deepcopy(l1)
+    l1.factorize(gram.toarray() if sparse.issparse(gram) else gram)
+    Xy = X_train.T @ y_train
+
+    mse = np.zeros(alphas.size)
+    coef = np.zeros((alphas.size, y.shape[1], X.shape[1])) if solutions else None
+    for i in np.argsort(alphas)[::-1]:
+        l1.alpha = alphas[i]
+        l1.solve(Xy, X_train.shape[0])
+        residue = y_test - l1.predict(X_test).reshape(y_test.shape)
+        mse[i] = np.mean(residue ** 2)
+        if solutions:
+            coef[i] = np.reshape(l1.coef_, (y.shape[1], -1))
+    return mse, np.zeros(alphas.size), coef
+
+
+def _fold_mean(result, shape, axis):
+    """Return the means over the folds of the items of the task results, where the
+    results are reshaped to `shape` with the folds along `axis`. The items that are
+    None, such as the solutions that are not returned, are None."""
+    return [
+        None
+        if item[0] is None
+        else np.asarray(item).reshape(shape + np.shape(item[0])).mean(axis)
+        for item in zip(*result)
+    ]
+
+
+def _column_snr(s):
+    """Return the signal-to-noise ratio of the columns of the signal, as the ratio of
+    the maximum absolute amplitude of a column to the standard deviation of the
+    noise of the column. The noise of every column is estimated from the median
+    absolute deviation of the first differences of the column, which is insensitive
+    to the smooth line-shapes."""
+    s = np.asarray(s).real
+    diff = np.diff(s, axis=0)
+    deviation = np.abs(diff - np.median(diff, axis=0))
+    sigma = 1.4826 * np.median(deviation, axis=0) / np.sqrt(2.0)
+    return np.abs(s).max(axis=0) / np.maximum(sigma, np.finfo(float).tiny)
+
+
+def _check_screening(screening, method):
+    """Check if the screening is applicable to the method."""
+    if screening and method not in __screening_methods__:
+        raise ValueError(
+            f"The screening is only applicable to the methods {__screening_methods__}."
+        )
+
+
+def _check_kernel(K, method, cross_validation=False):
+    """Check if the kernel is applicable to the method. A KroneckerKernel is only
+    applicable to the methods solved from the normal equations, and not to the
+    cross-validation, which requires the rows of the kernel."""
+    if not isinstance(K, KroneckerKernel):
+        return
+    if cross_validation:
+        raise TypeError(
+            "The cross-validation requires the rows of the kernel. Compress the "
+            "KroneckerKernel with the TSVDCompression class before fitting."
+        )
+    if method not in __factored_methods__:
+        raise TypeError(
+            f"A KroneckerKernel is only applicable to the methods "
+            f"{__factored_methods__}. Compress the kernel with the TSVDCompression "
+            "class to fit with the other methods."
+        )
+
+
+def _limited(limits, func, *args):
+    """Return func(*args) evaluated with at most `limits` BLAS threads."""
+    with threadpool_limits(limits=limits):
+        return func(*args)
+
+
+def _memmap(array, folder, name):
+    """Save the dense or sparse array to the folder and return the read-only
+    memory-mapped array."""
+    if sparse.issparse(array):
+        array = array.tocsc()
+        data = [
+            _memmap(item, folder, f"{name}_{i}")
+            for i, item in enumerate([array.data, array.indices, array.indptr])
+        ]
+        return sparse.csc_matrix(tuple(data), shape=array.shape, copy=False)
+
+    filename = os.path.join(folder, f"{name}.npy")
+    np.save(filename, array)
+    return np.load(filename, mmap_mode="r")
+
+
+def _get_fold_data(X, y, train, test, start, factor):
+    """Return the train and test sets of the fold. The regularization rows of the
+    train set, from index `start` of X, are scaled by `factor`."""
+    train = np.asarray(train)
+    X_train = X[train]
+    if factor != 1:
+        X_train = _scale_rows(X_train, np.count_nonzero(train < start), factor)
+
+    if sparse.issparse(X_train):
+        X_train = X_train.tocsc()
+    else:
+        X_train = np.asfortranarray(X_train)
+    return X_train, np.asfortranarray(y[train]), X[test], y[test]
+
+
+def _scale_rows(K, start, factor):
+    """Scale the rows of the kernel, K, from index `start` by `factor`. A dense
+    kernel is scaled in-place."""
+    if sparse.issparse(K):
+        scale = np.ones(K.shape[0])
+        scale[start:] = factor
+        return (sparse.diags(scale) @ K).tocsc()
+
+    K[start:] *= factor
+    return K
 
 
 def _get_smooth_size(f_shape, regularizer, max_size):
@@ -610,65 +1368,146 @@ def _get_cv_indexes(K, folds, regularizer, f_shape=None, random=False, times=1):
 
 
 def generate_J_i(Ai, alpha, f_shape):
+    """Return the list of sparse matrices, sqrt(alpha) J_i, where J_i is the
+    Kronecker product of the identity matrices and the sparse matrix Ai(n_i) along
+    the i-th dimension."""
     J = []
     sqrt_alpha = np.sqrt(alpha)
-    identity = [np.eye(i) for i in f_shape]
+    identity = [sparse.identity(i, format="csr") for i in f_shape]
     for i, i_count in enumerate(f_shape):
         J_array = deepcopy(identity)
         J_array[i] = Ai(i_count)
-        Ji_ = 1
-        for j_array_ in J_array:
-            Ji_ = np.kron(Ji_, j_array_)
+        Ji_ = reduce(lambda a, b: sparse.kron(a, b, format="csr"), J_array)
         J.append(Ji_ * sqrt_alpha)
     return J
 
 
-def _get_augmented_data(K, s, alpha, regularizer, f_shape=None):
-    """Creates a smooth kernel, K, with alpha regularization parameter."""
-    if alpha == 0:
-        return np.asfortranarray(K), np.asfortranarray(s)
+def Ai_smooth_lasso(i):
+    """The (i-1) x i first difference matrix of the smooth lasso regularizer."""
+    return sparse.diags([1, -1], [0, 1], shape=(i - 1, i), format="csr")
 
-    ks0, ks1 = K.shape
-    ss0, ss1 = s.shape
 
+def Ai_sparse_ridge_fusion(i):
+    """The (i-2) x i second difference matrix of the sparse ridge fusion
+    regularizer."""
+    return sparse.diags([-1, 2, -1], [0, 1, 2], shape=(i - 2, i), format="csr")
+
+
+def _get_J(alpha, regularizer, f_shape):
+    """Return the list of sparse regularization matrices, sqrt(alpha) J_i."""
+    if regularizer == "smooth lasso":
+        return generate_J_i(Ai_smooth_lasso, alpha, f_shape)
+    if regularizer == "sparse ridge fusion":
+        return generate_J_i(Ai_sparse_ridge_fusion, alpha, f_shape)
+    return []
+
+
+def _get_normal_equations(K, s, alpha, regularizer, f_shape=None):
+    r"""Return the normal equations of the augmented problem, evaluated without
+    forming the augmented kernel. The products with a KroneckerKernel are evaluated
+    from its factors.
+
+    Returns:
+        A tuple (gram, b, n_samples) of the Gram matrix, :math:`{\bf G} = {\bf K}^T
+        {\bf K} + \alpha \sum_i {\bf J}_i^T{\bf J}_i`, the product, :math:`{\bf b}
+        = {\bf K}^T{\bf s}`, and the number of rows of the augmented kernel.
+    """
     if isinstance(f_shape, int):
         f_shape = (f_shape,)
 
-    smooth_size = _get_smooth_size(f_shape, regularizer, ks1)
+    if isinstance(K, KroneckerKernel):
+        gram, b = K.gram(), K.rmatvec(s.real)
+    else:
+        K = np.asarray(_dense(K))
+        gram, b = K.T @ K, K.T @ s.real
+    n_samples = K.shape[0]
+    if alpha != 0:
+        n_samples += _get_smooth_size(f_shape, regularizer, K.shape[1])
+        for J_i in _get_J(alpha, regularizer, f_shape):
+            gram += (J_i.T @ J_i).toarray()
+    return gram, b, n_samples
+
+
+def _get_augmented_normal_equations(Ks, ss):
+    """Return the normal equations of the already built augmented kernel and signal,
+    as a tuple (gram, b, n_samples)."""
+    gram = Ks.T @ Ks
+    gram = gram.toarray() if sparse.issparse(gram) else gram
+    return gram, np.asarray(Ks.T @ ss), Ks.shape[0]
+
+
+def _get_gram_data(K, s, alpha, regularizer, f_shape=None):
+    r"""Return an equivalent least-squares problem of at most n rows, along with its
+    Gram matrix, from the normal equations of the augmented problem.
+
+    The Gram matrix, :math:`{\bf G} = {\bf K}^T{\bf K} + \alpha \sum_i {\bf J}_i^T
+    {\bf J}_i`, and :math:`{\bf b} = {\bf K}^T{\bf s}` are evaluated without forming
+    the augmented kernel. With the eigendecomposition, :math:`{\bf G} = {\bf V}
+    \text{diag}({\bf w}) {\bf V}^T`, the design, :math:`{\bf X} = \text{diag}(
+    {\bf w}^{1/2}) {\bf V}^T`, and the target, :math:`{\bf y} = \text{diag}(
+    {\bf w}^{-1/2}) {\bf V}^T {\bf b}`, over the non-zero eigenvalues, give
+    :math:`\|{\bf Xf - y}\|^2 = \|{\bf K}_\alpha{\bf f} - {\bf s}_\alpha\|^2 +
+    \text{const}`, where :math:`{\bf K}_\alpha` and :math:`{\bf s}_\alpha` are the
+    augmented kernel and signal. The design and the target are scaled to compensate
+    the 1/(2 n_samples) factor of the Lasso objective for the change in the number
+    of samples.
+
+    Returns:
+        A tuple (X, y, gram), where gram is the Gram matrix of X.
+    """
+    gram, b, n_samples = _get_normal_equations(K, s, alpha, regularizer, f_shape)
 
-    if regularizer == "smooth lasso":
+    w, V = np.linalg.eigh(gram)
+    index = w > w.max() * gram.shape[0] * np.finfo(float).eps
+    w, V = w[index], V[:, index]
 
-        def Ai_smooth_lasso(i):
-            return (-1 * np.eye(i) + np.diag(np.ones(i - 1), k=-1))[1:]
+    scale = np.sqrt(w.size / n_samples)
+    X = (np.sqrt(w) * scale)[:, np.newaxis] * V.T
+    y = (V.T @ b) * (scale / np.sqrt(w))[:, np.newaxis]
+    return np.asfortranarray(X), np.asfortranarray(y), gram * scale ** 2
 
-        J = generate_J_i(Ai_smooth_lasso, alpha, f_shape)
 
-    if regularizer == "sparse ridge fusion":
+def _get_augmented_data(K, s, alpha, regularizer, f_shape=None, sparse_kernel=False):
+    """Creates a smooth kernel, K, with alpha regularization parameter. If
+    `sparse_kernel` is True and K is a scipy sparse matrix, the augmented kernel is
+    returned as a scipy sparse CSC matrix, without forming the dense regularization
+    matrices. A dense K is always augmented as a dense matrix, since its sparse form
+    takes more memory than the dense form."""
+    sparse_kernel = sparse_kernel and sparse.issparse(K)
+    if alpha == 0:
+        if sparse_kernel:
+            return sparse.csc_matrix(K), np.asfortranarray(s)
+        return np.asfortranarray(_dense(K)), np.asfortranarray(s)
 
-        def Ai_sparse_ridge_fusion(i):
-            A_temp = -1 * np.eye(i)
-            A_temp += 2 * np.diag(np.ones(i - 1), k=-1)
-            A_temp += -1 * np.diag(np.ones(i - 2), k=-2)
-            return A_temp[2:]
-            # return (
-            #     -1 * np.eye(i)
-            #     + 2 * np.diag(np.ones(i - 1), k=-1)
-            #     - 1 * np.diag(np.ones(i - 2), k=-2)
-            # )[2:]
+    ks0, ks1 = K.shape
+    ss0, ss1 = s.shape
 
-        J = generate_J_i(Ai_sparse_ridge_fusion, alpha, f_shape)
+    if isinstance(f_shape, int):
+        f_shape = (f_shape,)
 
-    K_ = np.empty((ks0 + smooth_size, ks1))
+    smooth_size = _get_smooth_size(f_shape, regularizer, ks1)
+    J = _get_J(alpha, regularizer, f_shape)
 
-    K_[:ks0] = K
+    s_ = np.zeros((ss0 + smooth_size, ss1))
+    s_[:ss0] = s.real
+
+    if sparse_kernel:
+        K_ = sparse.vstack([K, *J], format="csc")
+        return K_, np.asfortranarray(s_)
+
+    K_ = np.zeros((ks0 + smooth_size, ks1), order="F")
+
+    K_[:ks0] = _dense(K)
     start = ks0
-    end = ks0
     for J_i in J:
-        end = end + J_i.shape[0]
-        K_[start:end] = J_i
-        start = end
+        # scatter the non-zeros of the sparse operator into the zero rows.
+        J_i = J_i.tocoo()
+        K_[start + J_i.row, J_i.col] = J_i.data
+        start = start + J_i.shape[0]
+
+    return K_, np.asfortranarray(s_)
 
-    s_ = np.zeros((ss0 + smooth_size, ss1))
-    s_[:ss0] = s.real
 
-    return np.asfortranarray(K_), np.asfortranarray(s_)
+def _dense(K):
+    """Return the kernel as a dense ndarray."""
+    return K.toarray() if sparse.issparse(K) else K
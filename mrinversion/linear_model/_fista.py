@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from scipy import sparse
+from scipy.linalg import eigh
+from sklearn.metrics import r2_score
+
+from mrinversion.linear_model._admm import _shrink
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+
+class FISTALasso:
+    r"""
+    The Lasso estimator solved with the fast iterative shrinkage-thresholding
+    algorithm (FISTA). The estimator minimizes the objective function of the
+    scikit-learn Lasso,
+
+    .. math::
+        \frac{1}{2 N} \| {\bf Xw - y} \|^2_2 + a \| {\bf w} \|_1,
+
+    where :math:`N` is the number of samples and :math:`a` is the `alpha` parameter.
+    All columns of :math:`{\bf y}` are updated together with the vectorized proximal
+    gradient step, :math:`{\bf w} = \text{prox}({\bf v} - ({\bf Gv} - {\bf X}^T{\bf y})
+    / L)`, where :math:`{\bf G} = {\bf X}^T{\bf X}` is the Gram matrix and :math:`L`
+    is its largest eigenvalue. The proximal operator is the soft-thresholding, with
+    the non-negativity constraint when `positive` is True. The momentum of a column
+    is restarted when the step opposes the momentum, and the converged columns are
+    dropped from the update.
+
+    Args:
+        alpha: Float, the l1 hyperparameter, :math:`a`.
+        max_iter: Integer, the maximum number of iterations.
+        tol: Float, the relative tolerance of the change in the solution of a column.
+        positive: Boolean. If True, the solution is constrained to positive values.
+        warm_start: Boolean. If True, the iterations start from the solution of the
+            previous fit.
+    """
+
+    def __init__(
+        self,
+        alpha=1.0,
+        max_iter=10000,
+        tol=1e-5,
+        positive=False,
+        warm_start=False,
+    ):
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.tol = tol
+        self.positive = positive
+        self.warm_start = warm_start
+
+        self.gram_ = None
+        self.lipschitz_ = None
+        self._coef = None
+
+    def factorize(self, gram):
+        """Cache the Gram matrix and its largest eigenvalue, the Lipschitz constant of
+        the gradient.
+
+        Args:
+            gram: A ndarray of shape (n_features, n_features), the Gram matrix,
+                :math:`{\\bf X}^T{\\bf X}`.
+        """
+        self.gram_ = np.asarray(gram)
+        n = self.gram_.shape[0]
+        largest = eigh(self.gram_, eigvals_only=True, subset_by_index=[n - 1, n - 1])
+        self.lipschitz_ = max(largest[0], np.finfo(float).eps)
+        self._coef = None
+        return self
+
+    def fit(self, X, y):
+        """Evaluate the Gram matrix of X and fit the model.
+
+        Args:
+            X: A dense or sparse design matrix of shape (n_samples, n_features).
+            y: A ndarray of shape (n_samples,) or (n_samples, n_targets).
+        """
+        gram = X.T @ X
+        self.factorize(gram.toarray() if sparse.issparse(gram) else gram)
+        return self.solve(X.T @ y, X.shape[0])
+
+    def solve(self, Xy, n_samples, coef_init=None):
+        """Fit the model from the product, :math:`{\\bf X}^T{\\bf y}`, with the cached
+        Gram matrix.
+
+        Args:
+            Xy: A ndarray of shape (n_features,) or (n_features, n_targets).
+            n_samples: The number of samples, :math:`N`, of the design matrix.
+            coef_init: A ndarray of shape (n_targets, n_features), the initial
+                solution, or None. The initial solution takes precedence over the
+                warm start.
+        """
+        Xy = np.asarray(Xy)
+        single = Xy.ndim == 1
+        Xy = Xy[:, np.newaxis] if single else Xy
+
+        threshold = self.alpha * n_samples / self.lipschitz_
+        w = self._initial_state(Xy.shape, coef_init)
+        v, t = w.copy(), np.ones(Xy.shape[1])
+
+        # the columns of the signal that are not yet converged.
+        active = np.arange(Xy.shape[1])
+        n_iter = 0
+        while active.size > 0 and n_iter < self.max_iter:
+            n_iter += 1
+            va, wa = v[:, active], w[:, active]
+            step = va - (self.gram_ @ va - Xy[:, active]) / self.lipschitz_
+            w_new = _shrink(step, threshold, self.positive)
+
+            t_new = (1.0 + np.sqrt(1.0 + 4.0 * t[active] ** 2)) / 2.0
+            momentum = (t[active] - 1.0) / t_new
+            # restart the momentum of the columns where the step opposes it.
+            restart = np.sum((va - w_new) * (w_new - wa), axis=0) > 0
+            momentum[restart], t_new[restart] = 0.0, 1.0
+
+            v[:, active] = w_new + momentum * (w_new - wa)
+            w[:, active], t[active] = w_new, t_new
+
+            change = np.linalg.norm(w_new - wa, axis=0)
+            size = np.maximum(np.linalg.norm(w_new, axis=0), np.finfo(float).tiny)
+            active = active[change > self.tol * size]
+
+        self._coef = w
+        self.coef_ = w[:, 0] if single or w.shape[1] == 1 else w.T
+        self.n_iter_ = n_iter
+        return self
+
+    def _initial_state(self, shape, coef_init=None):
+        """Return the initial solution."""
+        if coef_init is not None:
+            return np.reshape(coef_init, shape[::-1]).T.copy()
+        if self.warm_start and self._coef is not None and self._coef.shape == shape:
+            return self._coef.copy()
+        return np.zeros(shape)
+
+    def predict(self, X):
+        """Return the prediction, :math:`{\\bf Xw}`."""
+        return X @ self.coef_.T
+
+    def score(self, X, y, sample_weight=None):
+        """Return the coefficient of determination, :math:`R^2`, of the prediction."""
+        return r2_score(y, self.predict(X), sample_weight=sample_weight)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import warnings
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import lasso_path
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+# The number of coordinate descent iterations between the gap safe screening passes.
+__screening_interval__ = 10
+
+
+def gap_safe_fit(estimator, X, y):
+    r"""Fit the Lasso estimator with the gap safe screening rule and return the
+    fitted estimator along with the list of the number of discarded columns of X at
+    every screening pass.
+
+    The columns of X that are provably zero in the solution of every column of y are
+    discarded before the fit and after every `__screening_interval__` coordinate
+    descent iterations. The fit continues on the remaining columns, warm-started from
+    the current solution, until the duality gap is within the tolerance. The
+    solution is polished with a warm-started fit over all columns. A warm-start
+    estimator with the `coef_` attribute starts from its `coef_`. When the
+    estimator precomputes the Gram matrix, the Gram matrix of a dense X is computed
+    once, and its active block is passed to every reduced fit and the polish.
+    """
+    if estimator.get_params()["precompute"] is True and not sparse.issparse(X):
+        coef = getattr(estimator, "coef_", None)
+        estimator = clone(estimator).set_params(precompute=X.T @ X)
+        if coef is not None:
+            estimator.coef_ = coef
+    params = estimator.get_params()
+    if params["alpha"] <= 0:
+        return estimator.fit(X, y), [0]
+
+    n_features = X.shape[1]
+    coef = np.zeros((n_features, y.shape[1]))
+    if params["warm_start"] and hasattr(estimator, "coef_"):
+        coef[:] = np.reshape(estimator.coef_, (y.shape[1], n_features)).T
+    norms = _column_norms(X)
+    threshold = params["tol"] * (y ** 2).sum(axis=0)
+
+    alpha, positive = params["alpha"], params["positive"]
+    active = np.ones(n_features, dtype=bool)
+    screened, n_iter = [], 0
+    while n_iter < params["max_iter"]:
+        gap, inactive = _safe_rule(X, y, coef, alpha, positive, norms)
+        active &= ~inactive.all(axis=1)
+        screened.append(n_features - np.count_nonzero(active))
+        if np.all(gap <= threshold) or not active.any():
+            break
+
+        reduced = clone(estimator).set_params(
+            max_iter=min(__screening_interval__, params["max_iter"] - n_iter),
+            warm_start=True,
+        )
+        if isinstance(params["precompute"], np.ndarray):
+            reduced.set_params(precompute=params["precompute"][np.ix_(active, active)])
+        reduced.coef_ = coef[active].T
+
+        # the convergence is tested with the duality gap of the full problem.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=ConvergenceWarning)
+            reduced.fit(X[:, active], y)
+
+        coef[:] = 0.0
+        coef[active] = reduced.coef_.reshape(y.shape[1], -1).T
+        n_iter += np.max(reduced.n_iter_)
+
+    estimator = clone(estimator).set_params(
+        max_iter=max(params["max_iter"] - n_iter, 1), warm_start=True
+    )
+    estimator.coef_ = coef.T
+    estimator.fit(X, y)
+    estimator.n_iter_ = n_iter + np.max(estimator.n_iter_)
+    return estimator, screened
+
+
+def strong_rule_path(X, y, alphas, precompute, Xy, params):
+    r"""Return the Lasso solutions of the column, y, along the decreasing alphas, as
+    an array of shape (n_features, alphas.size), with the sequential strong rule,
+    along with the number of discarded columns of X at every alpha.
+
+    At every alpha, the columns whose correlation with the residual of the previous
+    solution is below `2 alpha - alpha_previous` are discarded, and the fit is
+    warm-started from the previous solution. The discarded columns that violate the
+    KKT conditions of the solution are added back and the fit is repeated.
+    `precompute` is the Gram matrix of X, or False, and `Xy` is the product of X
+    transpose and y, or None.
+    """
+    n_features = X.shape[1]
+    coef = np.zeros(n_features)
+    coefs = np.zeros((n_features, alphas.size))
+    screened = np.zeros(alphas.size)
+
+    corr = _correlation(X, y, coef, precompute, Xy, params["positive"])
+    previous = corr.max()
+    for k, alpha in enumerate(alphas):
+        active = (coef != 0) | (corr >= 2 * alpha - previous)
+        while True:
+            if active.any():
+                args = (alpha, active, coef, precompute, Xy, params)
+                coef[:] = _reduced_path(X, y, *args)
+                corr = _correlation(X, y, coef, precompute, Xy, params["positive"])
+            violations = ~active & (corr > alpha)
+            if not violations.any():
+                break
+            active |= violations
+
+        coefs[:, k] = coef
+        screened[k] = n_features - np.count_nonzero(active)
+        previous = alpha
+    return coefs, screened
+
+
+def _reduced_path(X, y, alpha, active, coef, precompute, Xy, params):
+    """Return the Lasso solution at alpha over the active columns of X, warm-started
+    from coef, as an array of shape (n_features,). With the Gram matrix, the path
+    only uses the shape of X, and the active columns of X are not copied."""
+    index = np.flatnonzero(active)
+    if precompute is False:
+        kwargs = dict(X=X[:, index], precompute=False, Xy=None)
+    else:
+        kwargs = dict(
+            X=X[:, : index.size],
+            precompute=precompute[np.ix_(index, index)],
+            Xy=np.ascontiguousarray(Xy[index]),
+            check_input=False,
+        )
+    _, path, _ = lasso_path(
+        y=y, alphas=[alpha], coef_init=coef[index], **kwargs, **params
+    )
+    coef = np.zeros(X.shape[1])
+    coef[index] = path[:, 0]
+    return coef
+
+
+def _correlation(X, y, coef, precompute, Xy, positive):
+    """Return the correlation of the columns of X with the residual of coef, scaled
+    by the number of samples, as the signed correlation if positive, else as the
+    absolute correlation."""
+    if precompute is False:
+        corr = X.T @ (y - X @ coef)
+    else:
+        corr = Xy - precompute @ coef
+    corr = corr / X.shape[0]
+    return corr if positive else np.abs(corr)
+
+
+def _safe_rule(X, y, coef, alpha, positive, norms):
+    r"""Return the duality gaps of the Lasso problems of the columns of y at the
+    solution, coef, along with the mask of the columns of X that are safely zero in
+    the solution, as an array of shape (n_features, n_targets).
+
+    The Lasso problem, :math:`\frac{1}{2}\|{\bf y - Xw}\|^2 + \lambda\|{\bf w}\|_1`,
+    where :math:`\lambda` is the product of alpha and the number of samples, has the
+    dual feasible point, :math:`\theta = {\bf r}/\max(\lambda, \|{\bf X}^T{\bf r}
+    \|_\infty)`, from the residual, :math:`{\bf r}`. The column :math:`{\bf x}_j` is
+    zero in the solution when :math:`|{\bf x}_j^T\theta| + \|{\bf x}_j\| \sqrt{2
+    \text{gap}} / \lambda < 1`. For the positive Lasso, the signed correlation,
+    :math:`{\bf x}_j^T\theta`, replaces the absolute correlation.
+    """
+    lambda_ = alpha * X.shape[0]
+    residue = y - X @ coef
+    corr = X.T @ residue
+    corr = corr if positive else np.abs(corr)
+    scale = np.maximum(lambda_, corr.max(axis=0))
+    theta = residue / scale
+
+    primal = 0.5 * (residue ** 2).sum(axis=0) + lambda_ * np.abs(coef).sum(axis=0)
+    dual = 0.5 * (y ** 2).sum(axis=0)
+    dual -= 0.5 * lambda_ ** 2 * ((theta - y / lambda_) ** 2).sum(axis=0)
+    gap = np.maximum(primal - dual, 0.0)
+
+    radius = np.sqrt(2.0 * gap) / lambda_
+    bound = corr / scale + norms[:, np.newaxis] * radius
+    return gap, bound < 1.0
+
+
+def _column_norms(X):
+    """Return the Euclidean norms of the columns of the dense or sparse X."""
+    if sparse.issparse(X):
+        return np.sqrt(np.asarray(X.multiply(X).sum(axis=0))).ravel()
+    return np.linalg.norm(X, axis=0)
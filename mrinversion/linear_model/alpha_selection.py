@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+import csdmpy as cp
+import numpy as np
+from scipy.linalg import cholesky
+from scipy.linalg import solve_triangular
+from scipy.linalg import svd
+
+from mrinversion.linear_model._base_l1l2 import _get_J
+
+__author__ = "Deepansh J. Srivastava"
+__email__ = "srivastava.89@osu.edu"
+
+__selection_methods__ = ("gcv", "l-curve", "discrepancy")
+
+
+class AlphaSelection:
+    r"""
+    The closed-form estimators of the smoothness hyperparameter, :math:`\alpha`, for
+    the :math:`\ell_2` part of the smooth-lasso problem,
+
+    .. math::
+        {\bf f}_\alpha = \underset{{\bf f}}{\text{argmin}} \left( \| {\bf Kf - s}
+                    \|^2_2 + \mu \sum_{i=1}^{d} \| {\bf J}_i {\bf f} \|_2^2 \right),
+
+    where :math:`\mu = \alpha \, m \, m_\text{count}` is the weight of the smoothness
+    term in the linear models. The generalized singular value decomposition of the
+    pair :math:`({\bf K}, {\bf J})` is evaluated once, from the Cholesky factor,
+    :math:`{\bf R}^T{\bf R} = {\bf K}^T{\bf K} + {\bf J}^T{\bf J}`, and the singular
+    value decomposition, :math:`{\bf KR}^{-1} = {\bf U}\text{diag}({\bf c}){\bf W}^T`,
+    where :math:`\gamma_i = c_i^2` are the squared generalized singular values. The
+    residual norm, the solution seminorm, and the trace of the influence matrix of
+    every :math:`\alpha` then follow in closed form from the filter factors,
+    :math:`\gamma_i / (\gamma_i + \mu (1 - \gamma_i))`, and the projections,
+    :math:`{\bf U}^T{\bf s}`.
+
+    The :math:`\alpha` is selected with the generalized cross-validation (GCV), the
+    corner of the L-curve, or the discrepancy principle. The estimate gives a
+    candidate, or a narrow range, of :math:`\alpha` for the cross-validation of the
+    :math:`\lambda` hyperparameter.
+
+    Args
+    ----
+
+    K: ndarray or KroneckerKernel
+        The :math:`m \times n` kernel matrix, :math:`{\bf K}`.
+    s: ndarray or CSDM object.
+        A csdm object or an equivalent numpy array holding the signal,
+        :math:`{\bf s}`, as a :math:`m \times m_\text{count}` matrix.
+    inverse_dimension: list
+        A list of csdmpy Dimension objects representing the inverse space.
+    regularizer: str
+        The literal specifying the form of the matrices :math:`{\bf J}_i`. The allowed
+        literals are `smooth lasso` and `sparse ridge fusion`. The default is
+        `smooth lasso`.
+
+    Example
+    -------
+
+    >>> from mrinversion.linear_model import AlphaSelection
+    >>> selection = AlphaSelection(K, s, inverse_dimension)  # doctest: +SKIP
+    >>> alpha = selection.select("gcv")  # doctest: +SKIP
+    """
+
+    def __init__(self, K, s, inverse_dimension, regularizer="smooth lasso"):
+        if isinstance(s, cp.CSDM):
+            s = s.dependent_variables[0].components[0].T
+        s = np.asarray(s).real
+        s = s[:, np.newaxis] if s.ndim == 1 else s
+
+        K = np.asarray(K)
+        f_shape = tuple([item.count for item in inverse_dimension])[::-1]
+
+        gram = K.T @ K
+        smooth = np.zeros_like(gram)
+        for J_i in _get_J(1.0, regularizer, f_shape):
+            smooth += (J_i.T @ J_i).toarray()
+
+        R = cholesky(gram + smooth)
+        U, c, _ = svd(solve_triangular(R, K.T, trans="T").T, full_matrices=False)
+        self.gamma = np.clip(c ** 2, 0.0, 1.0)
+
+        beta = U.T @ s
+        self._beta2 = (beta ** 2).sum(axis=1)
+        # the residual outside the range of K is independent of alpha.
+        self._residual0 = ((s - U @ beta) ** 2).sum()
+        self.n_samples = s.size
+        self.m = s.shape[0]
+
+    def _filter_factors(self, alphas):
+        """Return the filter factors, phi, and the seminorm factors,
+        phi (1 - gamma) / (gamma + mu (1 - gamma)), as arrays of shape
+        (gamma.size, alphas.size)."""
+        mu = np.asarray(alphas, dtype=float).ravel() * self.n_samples
+        gamma = self.gamma[:, np.newaxis]
+        denominator = gamma + mu * (1.0 - gamma)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            phi = np.nan_to_num(gamma / denominator)
+            psi = np.nan_to_num(phi * (1.0 - gamma) / denominator)
+        return phi, psi
+
+    def residual_norm(self, alphas):
+        r"""Return the residual norms, :math:`\|{\bf Kf}_\alpha - {\bf s}\|_2`.
+
+        Args:
+            alphas: A ndarray of :math:`\alpha` values.
+        """
+        phi, _ = self._filter_factors(alphas)
+        return np.sqrt(self._residual0 + self._beta2 @ (1.0 - phi) ** 2)
+
+    def solution_norm(self, alphas):
+        r"""Return the solution seminorms, :math:`(\sum_i \|{\bf J}_i{\bf f}_\alpha
+        \|_2^2)^{1/2}`.
+
+        Args:
+            alphas: A ndarray of :math:`\alpha` values.
+        """
+        _, psi = self._filter_factors(alphas)
+        return np.sqrt(self._beta2 @ psi)
+
+    def gcv(self, alphas):
+        r"""Return the generalized cross-validation function,
+        :math:`G(\alpha) = \frac{\|{\bf Kf}_\alpha - {\bf s}\|^2_2 / (m \,
+        m_\text{count})}{(1 - \text{tr}({\bf H}_\alpha) / m)^2}`, where
+        :math:`{\bf H}_\alpha` is the influence matrix.
+
+        Args:
+            alphas: A ndarray of :math:`\alpha` values.
+        """
+        trace = self._filter_factors(alphas)[0].sum(axis=0)
+        residual = self.residual_norm(alphas) ** 2 / self.n_samples
+        with np.errstate(divide="ignore"):
+            return residual / (1.0 - trace / self.m) ** 2
+
+    def l_curve(self, alphas):
+        """Return the L-curve as a tuple of the residual norms and the solution
+        seminorms.
+
+        Args:
+            alphas: A ndarray of :math:`\\alpha` values.
+        """
+        return self.residual_norm(alphas), self.solution_norm(alphas)
+
+    def select(self, method="gcv", alphas=None, sigma=None):
+        r"""Return the :math:`\alpha` selected with the given method.
+
+        Args
+        ----
+
+        method: str
+            The literal specifying the selection method. The allowed literals are
+
+            - `gcv`, the minimum of the generalized cross-validation function,
+            - `l-curve`, the point of maximum curvature of the L-curve on the log-log
+              scale, and
+            - `discrepancy`, the largest :math:`\alpha` with the root mean square
+              residual below the noise standard deviation, `sigma`.
+
+            The default is `gcv`.
+        alphas: ndarray
+            The :math:`\alpha` values searched in the selection. The default is 241
+            log-spaced values from :math:`10^{-10}` to :math:`10^2`.
+        sigma: float
+            The standard deviation of the noise in the signal. Required for the
+            `discrepancy` method.
+        """
+        if method not in __selection_methods__:
+            raise ValueError(
+                f"`{method}` is an invalid method. The allowed values are "
+                f"{__selection_methods__}."
+            )
+        alphas = np.logspace(-10, 2, 241) if alphas is None else np.asarray(alphas)
+        alphas = np.sort(alphas.ravel())
+
+        if method == "gcv":
+            return alphas[np.argmin(self.gcv(alphas))]
+
+        if method == "l-curve":
+            return alphas[np.argmax(_curvature(*self.l_curve(alphas)))]
+
+        if sigma is None:
+            raise ValueError("The `discrepancy` method requires the noise, `sigma`.")
+        rms = self.residual_norm(alphas) / np.sqrt(self.n_samples)
+        index = np.flatnonzero(rms <= sigma)
+        if index.size == 0:
+            raise ValueError(
+                "The residual of every alpha exceeds the noise standard deviation, "
+                "`sigma`."
+            )
+        return alphas[index[-1]]
+
+    def alpha_range(self, method="gcv", count=3, decades=1.0, alphas=None, sigma=None):
+        r"""Return a narrowed grid of :math:`\alpha` values, in descending order,
+        centered at the :math:`\alpha` selected with the given method.
+
+        Args
+        ----
+
+        method: str
+            The literal specifying the selection method. See the :meth:`select`
+            method. The default is `gcv`.
+        count: int
+            The number of :math:`\alpha` values of the grid. The default is 3.
+        decades: float
+            The width of the grid in decades. The default is 1.
+        alphas: ndarray
+            The :math:`\alpha` values searched in the selection.
+        sigma: float
+            The standard deviation of the noise in the signal.
+        """
+        alpha = self.select(method, alphas, sigma)
+        return alpha * np.logspace(decades / 2.0, -decades / 2.0, count)
+
+
+def _curvature(residual, solution):
+    """Return the curvature of the L-curve on the log-log scale along the parameter
+    index."""
+    x, y = np.log(residual), np.log(solution)
+    dx, dy = np.gradient(x), np.gradient(y)
+    ddx, ddy = np.gradient(dx), np.gradient(dy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kappa = (dx * ddy - ddx * dy) / (dx ** 2 + dy ** 2) ** 1.5
+    return np.nan_to_num(kappa, nan=-np.inf)
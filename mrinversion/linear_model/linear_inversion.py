@@ -1,15 +1,25 @@
 # -*- coding: utf-8 -*-
 import numpy as np
+from scipy.linalg import qr
+from scipy.sparse.linalg import svds
 
 __author__ = "Deepansh J. Srivastava"
 __email__ = "srivastava.89@osu.edu"
 
+# The singular value decompositions of the TSVD.
+__svd_methods__ = ("full", "randomized", "lanczos")
+
+# The number of singular values evaluated beyond the truncation index before the
+# partial decompositions stop.
+__oversampling__ = 8
+
 
 def find_optimum_singular_value(s):
     length = s.size
     s2 = s ** 2.0
     sj = s2 / s2.sum()
-    T = sj * np.log10(sj)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        T = sj * np.log10(sj)
     T[np.where(np.isnan(T))] = 0
     logn = np.log10(length)
     lognm1 = np.log10(length - 1.0)
@@ -24,22 +34,171 @@ def find_optimum_singular_value(s):
     return r
 
 
-def TSVD(K):
+def TSVD(K, method="full", rank=None, block=16, random_state=0):
+    """Return the singular value decomposition of K, along with the truncation
+    index, as a tuple (U, S, VT, r).
+
+    Args:
+        K: A ndarray of shape (m, n), the kernel.
+        method: The literal specifying the decomposition. The allowed literals are
+            `full`, the thin singular value decomposition, `randomized`, the
+            randomized range finder with blocks of random vectors, and `lanczos`,
+            the Lanczos bidiagonalization of ARPACK. The partial decompositions
+            evaluate the leading singular values in growing blocks, and stop once
+            the truncation index is `__oversampling__` values within the evaluated
+            values. The index of a partial decomposition is approximately the same
+            as the index of the full decomposition (exact when the computed rank
+            covers the retained spectrum). The default is `full`.
+        rank: The truncation index. The default is None, that is, the index is
+            selected with the entropy criterion.
+        block: The initial number of singular values of the partial decompositions.
+        random_state: The seed of the random vectors of the partial decompositions.
+    """
+    if method not in __svd_methods__:
+        raise ValueError(
+            f"`{method}` is an invalid method. The allowed values are "
+            f"{__svd_methods__}."
+        )
+    if method != "full":
+        return _partial_svd(K, method, rank, block, random_state)
+
     U, S, VT = np.linalg.svd(K, full_matrices=False)
-    r = find_optimum_singular_value(S)
+    r = find_optimum_singular_value(S) if rank is None else rank
     return U, S, VT, r
 
 
+def _partial_svd(K, method, rank, block, random_state):
+    """Return the leading singular triplets of K, along with the truncation index.
+    The entropy criterion is evaluated over the full length of the spectrum, with
+    the singular values that are not evaluated taken as zero, and, as their upper
+    bound, as the smallest evaluated value. The decomposition stops once both give
+    the same index within the evaluated values. The index is approximately the same
+    as the index of the full decomposition, and exact when the evaluated values cover
+    the retained spectrum, that is, when the remaining singular values are zero."""
+    K = np.asarray(K, dtype=np.float64)
+    size = min(K.shape)
+    if method == "randomized":
+        steps = _randomized_steps(K, block, random_state)
+    else:
+        steps = _lanczos_steps(K, block, random_state)
+
+    for U, S, VT in steps:
+        r = rank
+        if r is None:
+            r = find_optimum_singular_value(np.pad(S, (0, size - S.size)))
+            upper = np.pad(S, (0, size - S.size), mode="edge")
+            if r != find_optimum_singular_value(upper):
+                continue
+        if r + __oversampling__ <= S.size:
+            break
+    return U, S, VT, min(r, S.size)
+
+
+def _randomized_steps(K, block, random_state, power_iterations=2):
+    """Yield the singular triplets of K projected onto an orthonormal basis of its
+    range, grown by half of the basis, and at least `block` vectors, at every step.
+    Every block of random vectors is refined with the power iterations, and is
+    orthogonalized against the basis twice."""
+    random = np.random.default_rng(random_state)
+    size = min(K.shape)
+    Q, B = np.empty((K.shape[0], 0)), np.empty((0, K.shape[1]))
+    while Q.shape[1] < size:
+        count = min(max(block, Q.shape[1] // 2), size - Q.shape[1])
+        Y = _deflate(K @ random.standard_normal((K.shape[1], count)), Q)
+        for _ in range(power_iterations):
+            Y = _deflate(K @ (K.T @ _orthonormal(Y)), Q)
+        Y = _orthonormal(_deflate(_orthonormal(Y), Q))
+
+        Q, B = np.hstack([Q, Y]), np.vstack([B, Y.T @ K])
+        U, S, VT = np.linalg.svd(B, full_matrices=False)
+        yield Q @ U, S, VT
+
+
+def _lanczos_steps(K, block, random_state):
+    """Yield the leading singular triplets of K, in descending order, evaluated with
+    ARPACK, doubling the number of singular values at every step."""
+    size = min(K.shape)
+    v0 = np.random.default_rng(random_state).uniform(-1, 1, size)
+    count = min(block, size - 1)
+    while True:
+        U, S, VT = svds(K, k=count, v0=v0)
+        index = np.argsort(S)[::-1]
+        yield U[:, index], S[index], VT[index]
+        if count == size - 1:
+            return
+        count = min(2 * count, size - 1)
+
+
+def _orthonormal(Y):
+    """Return an orthonormal basis of the columns of Y."""
+    return qr(Y, mode="economic", check_finite=False)[0]
+
+
+def _deflate(Y, Q):
+    """Return Y with the components along the orthonormal basis, Q, removed."""
+    return Y - Q @ (Q.T @ Y)
+
+
 # standard deviation of noise remains unchanged after unitary tranformation.
-def reduced_subspace_kernel_and_data(U, S, VT, signal, sigma=None):
-    diagS = np.diag(S)
-    K_tilde = np.dot(diagS, VT)
-    s_tilde = np.dot(U.T, signal)
+def reduced_subspace_kernel_and_data(
+    U, S, VT, signal, sigma=None, by_products=True, block_size=None
+):
+    """Return the kernel and the signal projected onto the subspace of the singular
+    vectors, along with the projection of the signal onto the range of U and the
+    guess solution, as a tuple (K_tilde, s_tilde, projectedSignal, guess_solution).
 
-    projectedSignal = np.dot(U, s_tilde)
-    guess_solution = np.dot(np.dot(VT.T, np.diag(1 / S)), s_tilde)
+    Args:
+        U, S, VT: The truncated singular value decomposition of the kernel.
+        signal: A ndarray of shape (m, ...), the signal. A memory-mapped array is
+            read one block of columns at a time when `block_size` is given.
+        by_products: If False, the projected signal and the guess solution are not
+            evaluated and are returned as None. The default is True.
+        block_size: The number of columns of the signal projected at a time. The
+            default is None, that is, the complete signal.
+    """
+    K_tilde = np.asfortranarray(S[:, np.newaxis] * VT)
+    s_tilde = np.asfortranarray(
+        project_signal(lambda block: np.dot(U.T, block), signal, block_size)
+    )
+    if not by_products:
+        return K_tilde, s_tilde, None, None
 
-    K_tilde = np.asfortranarray(K_tilde)
-    s_tilde = np.asfortranarray(s_tilde)
-    projectedSignal = np.asfortranarray(projectedSignal)
+    projectedSignal = np.asfortranarray(np.tensordot(U, s_tilde, axes=(1, 0)))
+    guess_solution = np.tensordot(VT.T / S, s_tilde, axes=(1, 0))
     return K_tilde, s_tilde, projectedSignal, guess_solution
+
+
+def project_signal(projection, signal, block_size=None):
+    """Return the projection of the signal, evaluated over the blocks of columns of
+    the signal.
+
+    Args:
+        projection: The function returning the projection of a ndarray of shape
+            (m, count), as a ndarray of shape (r, count).
+        signal: A ndarray of shape (m, ...). The axes after axis 0 are flattened in
+            the order of the memory layout of the signal, such that the flattened
+            signal is a view and a memory-mapped signal is never copied. The axes
+            of a C-contiguous signal, such as a memory-mapped `.npy` file, are
+            flattened in the C order, else in the Fortran order, such that the
+            columns of the transpose of a C-ordered CSDM component are contiguous.
+        block_size: The number of columns projected at a time. The default is None,
+            that is, the complete signal.
+
+    Returns:
+        A ndarray of shape (r, ...).
+    """
+    shape = np.shape(signal)
+    order = "F"
+    if len(shape) > 2 and np.asarray(signal).flags["C_CONTIGUOUS"]:
+        order = "C"
+    signal = np.reshape(signal, (shape[0], -1), order=order)
+    if block_size is None:
+        projected = projection(np.asarray(signal))
+    else:
+        projected = np.hstack(
+            [
+                projection(np.asarray(signal[:, i : i + block_size]))
+                for i in range(0, signal.shape[1], block_size)
+            ]
+        )
+    return projected.reshape((-1,) + shape[1:], order=order)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from ._base_l1l2 import GeneralL2Lasso
 from ._base_l1l2 import GeneralL2LassoCV
+from .alpha_selection import AlphaSelection
 
 __author__ = "Deepansh J. Srivastava"
 __email__ = "srivastava.89@osu.edu"
@@ -60,6 +61,32 @@ class SmoothLasso(GeneralL2Lasso):
         If True, the amplitudes in the solution, :math:`{\bf f}`, is contrained to only
         positive values, else the solution may contain positive and negative amplitudes.
         The default is True.
+    method: str
+        The literal specifying the solver. The allowed literals are `gradient_decent`,
+        `multi-task`, `lars`, `sparse`, `gram`, `admm`, and `fista`. The `sparse`
+        solver is for a kernel given as a scipy sparse matrix. The sparse kernel and
+        the sparse smoothness operators, :math:`{\bf J}_i`, are stacked into a sparse
+        augmented kernel, which is never densified. A dense kernel is solved with
+        the dense augmented kernel, as the `gradient_decent` solver. The `gram`
+        solver works on the :math:`n \times n` Gram matrix, :math:`{\bf K}^T{\bf K}
+        + \alpha \sum_i {\bf J}_i^T{\bf J}_i`, and :math:`{\bf K}^T{\bf s}`, which
+        is efficient when :math:`m \gg n`. The `admm` solver uses the alternating
+        direction method of multipliers with the cached Cholesky factorization of the
+        Gram matrix shifted by :math:`\rho{\bf I}`, and solves all columns of the
+        signal as a single batched matrix solve. The `fista` solver updates all
+        columns of the signal together with the accelerated proximal gradient steps
+        and supports the `positive` constraint. The default is `gradient_decent`.
+    screening: bool
+        If True, the columns of the kernel that are provably zero in the solution are
+        discarded with the gap safe screening rule, before and periodically during the
+        fit. Only applicable to the `gradient_decent`, `sparse`, and `gram` methods.
+        The default is False.
+    snr_threshold: float
+        If provided, the signal-to-noise ratio of every column of the signal is
+        evaluated against the noise estimated from that column, and only the columns
+        with a ratio of at least `snr_threshold` are solved. The solution of the
+        other columns, such as the isotropic columns with only noise, is zero. The
+        default is None, that is, all columns are solved.
 
     Attributes
     ----------
@@ -70,6 +97,12 @@ class SmoothLasso(GeneralL2Lasso):
         \cdots n_1 \times n_0}`.
     n_iter: int
         The number of iterations required to reach the specified tolerance.
+    n_screened: list
+        The number of columns of the kernel discarded at every screening pass. None,
+        when `screening` is False.
+    snr: ndarray
+        The signal-to-noise ratio of the columns of the signal. None, when
+        `snr_threshold` is None.
     """
 
     def __init__(
@@ -81,6 +114,8 @@ class SmoothLasso(GeneralL2Lasso):
         tolerance=1e-5,
         positive=True,
         method="gradient_decent",
+        screening=False,
+        snr_threshold=None,
     ):
         super().__init__(
             alpha=alpha,
@@ -91,6 +126,8 @@ class SmoothLasso(GeneralL2Lasso):
             regularizer="smooth lasso",
             inverse_dimension=inverse_dimension,
             method=method,
+            screening=screening,
+            snr_threshold=snr_threshold,
         )
 
 
@@ -169,6 +206,72 @@ class SmoothLassoCV(GeneralL2LassoCV):
     n_jobs: int
         The number of CPUs used for computation. The default is -1, that is, all
         available CPUs are used.
+    method: str
+        The literal specifying the solver. The allowed literals are `gradient_decent`,
+        `multi-task`, `lars`, `sparse`, `gram`, `admm`, and `fista`. The `sparse`
+        solver is for a kernel given as a scipy sparse matrix. The sparse kernel and
+        the sparse smoothness operators, :math:`{\bf J}_i`, are stacked into a sparse
+        augmented kernel, which is never densified. A dense kernel is solved with
+        the dense augmented kernel, as the `gradient_decent` solver. The `gram`
+        solver works on the :math:`n \times n` Gram matrix, :math:`{\bf K}^T{\bf K}
+        + \alpha \sum_i {\bf J}_i^T{\bf J}_i`, and :math:`{\bf K}^T{\bf s}`, which
+        is efficient when :math:`m \gg n`. The `admm` solver uses the alternating
+        direction method of multipliers with the cached Cholesky factorization of the
+        Gram matrix shifted by :math:`\rho{\bf I}`, and solves all columns of the
+        signal as a single batched matrix solve. The `fista` solver updates all
+        columns of the signal together with the accelerated proximal gradient steps
+        and supports the `positive` constraint. The default is `gradient_decent`.
+    pathwise: bool
+        If True, the lambdas of every fold are fitted along the warm-started lasso
+        path, from the largest to the smallest lambda, reusing the Gram matrix of the
+        fold. Only applicable to the `gradient_decent`, `sparse`, `gram`, `admm`, and
+        `fista` methods. The `admm` and `fista` methods are always pathwise, reusing
+        the factorization of every alpha and fold for all lambdas. The `gram` method
+        is always pathwise, computing :math:`{\bf K}^T{\bf K}`,
+        :math:`{\bf J}^T{\bf J}`, and :math:`{\bf K}^T{\bf s}` of every fold once
+        and adding :math:`\alpha{\bf J}^T{\bf J}` for every alpha. The default is
+        False.
+    backend: str
+        The joblib backend of the cross-validation. The allowed literals are
+        `threading`, `loky`, and `multiprocessing`. With the process backends,
+        `loky` and `multiprocessing`, the augmented kernel and signal are shared
+        with the workers as memory-mapped files. The default is `threading`.
+    blas_threads: int
+        The maximum number of BLAS threads used by every job. The default is None,
+        that is, the number of CPUs divided by the number of jobs.
+    screening: bool
+        If True, the columns of the kernel that are provably zero in the solution are
+        discarded before fitting. Every fit of the grid uses the gap safe screening
+        rule, and the pathwise cross-validation uses the sequential strong rule along
+        the lambda path, with a check of the optimality conditions. Only applicable
+        to the `gradient_decent`, `sparse`, and `gram` methods. The default is False.
+    alpha_selection: str
+        The literal specifying the closed-form selection of :math:`\alpha` for the
+        :math:`\ell_2` part of the problem. The allowed literals are `gcv`,
+        `l-curve`, and `discrepancy`, see
+        :class:`~mrinversion.linear_model.AlphaSelection`. If provided, the `alphas`
+        are replaced by three values spanning one decade around the selected
+        :math:`\alpha`, and only the :math:`\lambda` grid is fully cross-validated.
+        The `discrepancy` method uses the noise, `sigma`. The default is None.
+    search: str
+        The literal specifying the search of the hyperparameters. The allowed
+        literals are `grid`, the cross-validation of every (:math:`\alpha`,
+        :math:`\lambda`) pair of the grid, and `adaptive`, a coarse-to-fine search
+        that starts with a 3 x 3 grid spanning the log range of the `alphas` and
+        `lambdas`, and repeatedly refines a 3 x 3 grid, with half the log step,
+        around the current best pair. The default is `grid`.
+    budget: int
+        The maximum number of (:math:`\alpha`, :math:`\lambda`) pairs evaluated
+        by the `adaptive` search. The default is None, that is, half the size of the
+        grid, and at least 9.
+    keep_solutions: bool
+        If True, the mean solutions of the folds at every (:math:`\alpha`,
+        :math:`\lambda`) pair are kept as the `cv_solutions` attribute. The solution
+        of a neighbouring pair is then available without another solve, at the cost
+        of holding the solutions of every fold of the grid. If False, only the
+        scores of the grid and the best mean solution, the warm start of the final
+        fit, are kept. The `gram` method then starts the final fit from zero. The
+        default is False.
 
 
     Attributes
@@ -183,6 +286,19 @@ class SmoothLassoCV(GeneralL2LassoCV):
         A dictionary with the :math:`\alpha` and :math:\lambda` hyperparameters.
     cross_validation_curve: CSDM object.
         The cross-validation error metric determined as the mean square error.
+    n_screened: ndarray
+        The mean number of columns of the kernel discarded over the folds, as an
+        array of shape (alphas.size, lambdas.size).
+    n_evaluations: int
+        The number of (:math:`\alpha`, :math:`\lambda`) pairs evaluated with the
+        cross-validation. With the `adaptive` search, the cross-validation curve is
+        defined over the evaluated alphas and lambdas, with the pairs that are not
+        evaluated set to NaN.
+    cv_solutions: ndarray
+        The mean solutions of the folds, as an array of shape (alphas.size,
+        lambdas.size, m_count, nd, ..., n1, n0), when `keep_solutions` is True, else
+        None. The final solution, `f`, is fitted to the complete data, warm-started
+        from the mean solution of the folds at the selected pair.
     """
 
     def __init__(
@@ -200,6 +316,14 @@ class SmoothLassoCV(GeneralL2LassoCV):
         verbose=False,
         n_jobs=-1,
         method="gradient_decent",
+        pathwise=False,
+        backend="threading",
+        blas_threads=None,
+        screening=False,
+        alpha_selection=None,
+        search="grid",
+        budget=None,
+        keep_solutions=False,
     ):
         super().__init__(
             alphas=alphas,
@@ -216,4 +340,33 @@ class SmoothLassoCV(GeneralL2LassoCV):
             verbose=verbose,
             n_jobs=n_jobs,
             method=method,
+            pathwise=pathwise,
+            backend=backend,
+            blas_threads=blas_threads,
+            screening=screening,
+            search=search,
+            budget=budget,
+            keep_solutions=keep_solutions,
         )
+        self.alpha_selection = alpha_selection
+
+    def fit(self, K, s):
+        r"""
+        Fit the model using the coordinate descent method from scikit-learn for
+        all alpha and lambda values using the `n`-folds cross-validation technique.
+        The cross-validation metric is the mean squared error. When
+        `alpha_selection` is provided, the alpha grid is first narrowed with the
+        closed-form selection.
+
+        Args:
+            K: A :math:`m \times n` kernel matrix, :math:`{\bf K}`. A numpy array of
+                shape (m, n).
+            s: A :math:`m \times m_\text{count}` signal matrix, :math:`{\bf s}` as a
+                csdm object or a numpy array or shape (m, m_count).
+        """
+        if self.alpha_selection is not None:
+            selection = AlphaSelection(K, s, self.inverse_dimension, self.regularizer)
+            self.cv_alphas = selection.alpha_range(
+                self.alpha_selection, sigma=self.sigma
+            )
+        super().fit(K, s)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from mrinversion.linear_model import AlphaSelection
+from mrinversion.linear_model import SmoothLassoCV
+from mrinversion.linear_model._base_l1l2 import _get_J
+
+
+def test_closed_form_l2_quantities(problem, inverse_dimension):
+    K, s = problem
+    s = np.stack([s, 0.5 * s], axis=1)
+    selection = AlphaSelection(K, s, inverse_dimension)
+
+    J = sum([(J_i.T @ J_i).toarray() for J_i in _get_J(1.0, "smooth lasso", (10, 12))])
+    alphas = np.asarray([1e-8, 1e-5, 1e-3])
+    residual, solution = selection.l_curve(alphas)
+    for i, alpha in enumerate(alphas):
+        A = K.T @ K + alpha * s.size * J
+        f = np.linalg.solve(A, K.T @ s)
+        assert np.allclose(residual[i], np.linalg.norm(K @ f - s))
+        assert np.allclose(solution[i], np.sqrt(np.trace(f.T @ J @ f)))
+
+        trace = np.trace(K @ np.linalg.solve(A, K.T))
+        gcv = np.linalg.norm(K @ f - s) ** 2 / s.size / (1 - trace / K.shape[0]) ** 2
+        assert np.allclose(selection.gcv([alpha])[0], gcv)
+
+
+def test_alpha_selection(problem, inverse_dimension):
+    K, s = problem
+    selection = AlphaSelection(K, s, inverse_dimension)
+    alphas = np.logspace(-10, 2, 241)
+
+    alpha = selection.select("gcv")
+    assert alpha == alphas[np.argmin(selection.gcv(alphas))]
+
+    sigma = 1e-3 * s.max()
+    alpha = selection.select("discrepancy", sigma=sigma)
+    assert selection.residual_norm([alpha])[0] / np.sqrt(s.size) <= sigma
+
+    alpha = selection.select("l-curve")
+    assert alphas[0] < alpha < alphas[-1]
+
+    alpha_range = selection.alpha_range("gcv", count=3, decades=1)
+    assert np.allclose(alpha_range[1], selection.select("gcv"))
+    assert np.allclose(alpha_range[0] / alpha_range[2], 10)
+
+    error = "is an invalid method"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        selection.select("aic")
+
+    error = "requires the noise"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        selection.select("discrepancy")
+
+
+def test_cross_validation_with_alpha_selection(problem, inverse_dimension):
+    K, s = problem
+    s_lasso_cv = SmoothLassoCV(
+        alphas=None,
+        lambdas=np.geomspace(1e-4, 1e-6, 3),
+        inverse_dimension=inverse_dimension,
+        folds=4,
+        alpha_selection="gcv",
+    )
+    s_lasso_cv.fit(K, s)
+
+    alpha_range = AlphaSelection(K, s, inverse_dimension).alpha_range("gcv")
+    assert np.allclose(s_lasso_cv.cv_alphas, alpha_range)
+    assert s_lasso_cv.hyperparameters["alpha"] in s_lasso_cv.cv_alphas
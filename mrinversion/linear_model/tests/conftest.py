@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import csdmpy as cp
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def inverse_dimension():
+    """The inverse dimensions of the 10 x 12 solution of the test problem."""
+    return [
+        cp.Dimension(type="linear", count=12, increment="1 Hz"),
+        cp.Dimension(type="linear", count=10, increment="1 Hz"),
+    ]
+
+
+@pytest.fixture
+def problem():
+    """The kernel and the noisy signal of a 10 x 12 solution with a block and a
+    peak, as a tuple (K, s)."""
+    np.random.seed(0)
+    t = np.linspace(0, 1, 200)
+    centers = np.linspace(0, 1, 120)
+    K = np.exp(-((t[:, np.newaxis] - centers[np.newaxis, :]) ** 2) / 0.005)
+    K /= K.sum(axis=0).max()
+
+    f = np.zeros((10, 12))
+    f[3:6, 4:8] = 1
+    f[7, 2] = 2
+    s = K @ f.ravel()
+    s += np.random.normal(0, 1e-3 * s.max(), s.shape)
+    return K, s
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.linear_model import Lasso
+
+from mrinversion.linear_model import SmoothLasso
+from mrinversion.linear_model import SmoothLassoCV
+from mrinversion.linear_model import TSVDCompression
+from mrinversion.linear_model._base_l1l2 import _column_snr
+from mrinversion.linear_model._base_l1l2 import _get_augmented_data
+from mrinversion.linear_model._screening import gap_safe_fit
+
+
+def test_sparse_augmented_data(problem):
+    K, s = problem
+    for regularizer in ["smooth lasso", "sparse ridge fusion"]:
+        K_, s_ = _get_augmented_data(K, s[:, np.newaxis], 2.0, regularizer, (10, 12))
+        K_sp, s_sp = _get_augmented_data(
+            sparse.csr_matrix(K),
+            s[:, np.newaxis],
+            2.0,
+            regularizer,
+            (10, 12),
+            sparse_kernel=True,
+        )
+        assert sparse.issparse(K_sp)
+        assert np.allclose(K_sp.toarray(), K_)
+        assert np.allclose(s_sp, s_)
+
+        # a dense kernel is not converted to a sparse matrix.
+        K_dense, _ = _get_augmented_data(
+            K, s[:, np.newaxis], 2.0, regularizer, (10, 12), sparse_kernel=True
+        )
+        assert isinstance(K_dense, np.ndarray)
+        assert np.allclose(K_dense, K_)
+
+
+def test_sparse_solver(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        alpha=1e-4,
+        lambda1=1e-5,
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-10,
+        max_iterations=100000,
+    )
+    s_lasso = SmoothLasso(**kwargs)
+    s_lasso.fit(K, s)
+
+    s_lasso_sparse = SmoothLasso(method="sparse", **kwargs)
+    s_lasso_sparse.fit(sparse.csr_matrix(K), s)
+    assert np.allclose(s_lasso_sparse.f, s_lasso.f, atol=1e-6 * s_lasso.f.max())
+
+
+def test_gram_solver(problem, inverse_dimension):
+    K, s = problem
+    s = np.stack([s, 2 * s], axis=1)
+    kwargs = dict(
+        alpha=1e-4,
+        lambda1=1e-5,
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-10,
+        max_iterations=100000,
+    )
+    s_lasso = SmoothLasso(**kwargs)
+    s_lasso.fit(K, s)
+
+    s_lasso_gram = SmoothLasso(method="gram", **kwargs)
+    s_lasso_gram.fit(K, s)
+    assert np.allclose(s_lasso_gram.f, s_lasso.f, atol=1e-6 * s_lasso.f.max())
+    assert np.allclose(s_lasso_gram.predict(K), s_lasso.predict(K))
+
+
+def test_pathwise_cross_validation(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        alphas=[1e-3, 1e-4, 1e-5],
+        lambdas=np.geomspace(1e-3, 1e-7, 6),
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-8,
+        max_iterations=100000,
+        folds=5,
+    )
+    s_lasso_cv = SmoothLassoCV(**kwargs)
+    s_lasso_cv.fit(K, s)
+
+    s_lasso_path = SmoothLassoCV(pathwise=True, **kwargs)
+    s_lasso_path.fit(K, s)
+
+    assert s_lasso_path.hyperparameters == s_lasso_cv.hyperparameters
+    cv_map = s_lasso_cv.cross_validation_curve.dependent_variables[0].components[0]
+    cv_path = s_lasso_path.cross_validation_curve.dependent_variables[0].components[0]
+    assert np.allclose(cv_path, cv_map, rtol=1e-5)
+
+    error = "pathwise cross-validation is only applicable"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        SmoothLassoCV(pathwise=True, method="lars", **kwargs).fit(K, s)
+
+
+def test_gram_cross_validation(problem, inverse_dimension):
+    K, s = problem
+    s = np.stack([s, 2 * s], axis=1)
+    kwargs = dict(
+        alphas=[1e-3, 1e-4, 1e-5],
+        lambdas=np.geomspace(1e-3, 1e-7, 5),
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-8,
+        max_iterations=100000,
+        folds=5,
+    )
+    s_lasso_cv = SmoothLassoCV(**kwargs)
+    s_lasso_cv.fit(K, s)
+    cv_map = s_lasso_cv.cross_validation_curve.dependent_variables[0].components[0]
+
+    s_lasso_gram = SmoothLassoCV(method="gram", **kwargs)
+    s_lasso_gram.fit(K, s)
+    cv_gram = s_lasso_gram.cross_validation_curve.dependent_variables[0].components[0]
+    assert s_lasso_gram.hyperparameters == s_lasso_cv.hyperparameters
+    assert np.allclose(cv_gram, cv_map, rtol=1e-5)
+    assert np.allclose(s_lasso_gram.f, s_lasso_cv.f, atol=1e-5 * s_lasso_cv.f.max())
+
+
+def test_cross_validation_grid(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        lambdas=np.geomspace(1e-3, 1e-7, 4),
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-8,
+        max_iterations=100000,
+        folds=5,
+    )
+    s_lasso_cv = SmoothLassoCV(alphas=[1e-3, 1e-4, 1e-5], **kwargs)
+    s_lasso_cv.fit(K, s)
+    cv_map = s_lasso_cv.cross_validation_curve.dependent_variables[0].components[0]
+
+    # every alpha of the grid is identical to the cross-validation at that alpha.
+    for i, alpha in enumerate([1e-3, 1e-4, 1e-5]):
+        s_lasso_alpha = SmoothLassoCV(alphas=[alpha], **kwargs)
+        s_lasso_alpha.fit(K, s)
+        cv_alpha = s_lasso_alpha.cross_validation_curve
+        cv_alpha = cv_alpha.dependent_variables[0].components[0]
+        assert np.allclose(cv_map[:, i], cv_alpha, rtol=1e-5)
+
+
+def test_process_backend_cross_validation(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        alphas=[1e-3, 1e-4],
+        lambdas=[1e-4, 1e-5, 1e-6],
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-8,
+        max_iterations=100000,
+        folds=4,
+        n_jobs=2,
+    )
+    s_lasso_cv = SmoothLassoCV(**kwargs)
+    s_lasso_cv.fit(K, s)
+    cv_map = s_lasso_cv.cross_validation_curve.dependent_variables[0].components[0]
+
+    for method in ["gradient_decent", "sparse"]:
+        s_lasso_loky = SmoothLassoCV(
+            backend="loky", blas_threads=1, method=method, **kwargs
+        )
+        s_lasso_loky.fit(sparse.csr_matrix(K) if method == "sparse" else K, s)
+        cv_loky = s_lasso_loky.cross_validation_curve
+        cv_loky = cv_loky.dependent_variables[0].components[0]
+        assert np.allclose(cv_loky, cv_map, rtol=1e-5)
+
+    error = "is an invalid backend"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        SmoothLassoCV(backend="dask", **kwargs)
+
+
+def test_screening(problem, inverse_dimension):
+    K, s = problem
+    s = np.stack([s, 2 * s], axis=1)
+    kwargs = dict(
+        alpha=1e-4,
+        lambda1=1e-4,
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-10,
+        max_iterations=100000,
+    )
+    for method in ["gradient_decent", "sparse", "gram"]:
+        s_lasso = SmoothLasso(method=method, **kwargs)
+        s_lasso.fit(K, s)
+
+        s_lasso_screen = SmoothLasso(method=method, screening=True, **kwargs)
+        s_lasso_screen.fit(sparse.csr_matrix(K) if method == "sparse" else K, s)
+        assert s_lasso_screen.n_screened[-1] > 0
+        assert np.allclose(s_lasso_screen.f, s_lasso.f, atol=1e-6 * s_lasso.f.max())
+
+    # the Gram matrix of a precomputing estimator is computed once and reused.
+    X, y = _get_augmented_data(K, s, s.size * 1e-4, "smooth lasso", (10, 12))
+    lasso = Lasso(alpha=5e-5, fit_intercept=False, precompute=True, tol=1e-10)
+    lasso_gram, screened = gap_safe_fit(lasso, X, y)
+    lasso_dense, _ = gap_safe_fit(lasso.set_params(precompute=False), X, y)
+    assert isinstance(lasso_gram.get_params()["precompute"], np.ndarray)
+    assert np.allclose(lasso_gram.get_params()["precompute"], X.T @ X)
+    assert np.allclose(lasso_gram.coef_, lasso_dense.coef_, atol=1e-8)
+    assert screened[-1] > 0
+
+    error = "screening is only applicable"
+    with pytest.raises(ValueError, match=".*{0}.*".format(error)):
+        SmoothLasso(method="lars", screening=True, **kwargs).fit(K, s)
+
+
+def test_screening_cross_validation(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        alphas=[1e-3, 1e-4],
+        lambdas=np.geomspace(1e-3, 1e-6, 4),
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-8,
+        max_iterations=100000,
+        folds=4,
+    )
+    s_lasso_cv = SmoothLassoCV(**kwargs)
+    s_lasso_cv.fit(K, s)
+    cv_map = s_lasso_cv.cross_validation_curve.dependent_variables[0].components[0]
+
+    for pathwise in [False, True]:
+        s_lasso_screen = SmoothLassoCV(pathwise=pathwise, screening=True, **kwargs)
+        s_lasso_screen.fit(K, s)
+        cv_screen = s_lasso_screen.cross_validation_curve
+        cv_screen = cv_screen.dependent_variables[0].components[0]
+        assert np.allclose(cv_screen, cv_map, rtol=1e-4)
+        assert s_lasso_screen.n_screened.shape == (2, 4)
+        assert s_lasso_screen.n_screened.max() > 0
+
+
+def test_batched_solvers(problem, inverse_dimension):
+    K, s = problem
+    s = np.stack([s, 2 * s], axis=1)
+    kwargs = dict(
+        alpha=1e-4,
+        lambda1=1e-5,
+        inverse_dimension=inverse_dimension,
+        max_iterations=100000,
+    )
+    s_lasso = SmoothLasso(tolerance=1e-10, **kwargs)
+    s_lasso.fit(K, s)
+
+    for method in ["admm", "fista"]:
+        s_lasso_batch = SmoothLasso(method=method, tolerance=1e-8, **kwargs)
+        s_lasso_batch.fit(K, s)
+        assert np.allclose(s_lasso_batch.f, s_lasso.f, atol=1e-5 * s_lasso.f.max())
+        assert np.allclose(s_lasso_batch.predict(K), s_lasso.predict(K), atol=1e-5)
+        assert s_lasso_batch.f.min() >= 0
+
+
+def test_batched_cross_validation(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        alphas=[1e-3, 1e-4],
+        lambdas=np.geomspace(1e-3, 1e-6, 4),
+        inverse_dimension=inverse_dimension,
+        max_iterations=100000,
+        folds=4,
+    )
+    s_lasso_cv = SmoothLassoCV(tolerance=1e-10, **kwargs)
+    s_lasso_cv.fit(K, s)
+    cv_map = s_lasso_cv.cross_validation_curve.dependent_variables[0].components[0]
+
+    for method in ["admm", "fista"]:
+        s_lasso_batch = SmoothLassoCV(method=method, tolerance=1e-8, **kwargs)
+        s_lasso_batch.fit(K, s)
+        cv_batch = s_lasso_batch.cross_validation_curve
+        cv_batch = cv_batch.dependent_variables[0].components[0]
+        assert np.allclose(cv_batch, cv_map, rtol=1e-4)
+        assert s_lasso_batch.hyperparameters == s_lasso_cv.hyperparameters
+
+
+def test_skip_noise_columns(problem, inverse_dimension):
+    K, s = problem
+    np.random.seed(1)
+    noise = np.random.normal(0, 1e-3 * s.max(), (s.size, 3))
+    s = np.column_stack([noise[:, 0], s, noise[:, 1], 0.5 * s, noise[:, 2]])
+    kwargs = dict(
+        alpha=1e-4,
+        lambda1=1e-5,
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-10,
+        max_iterations=100000,
+    )
+    s_lasso = SmoothLasso(**kwargs)
+    s_lasso.fit(K, s)
+
+    s_lasso_snr = SmoothLasso(snr_threshold=10, **kwargs)
+    s_lasso_snr.fit(K, s)
+    assert np.all(s_lasso_snr.snr[[1, 3]] > 10)
+    assert np.all(s_lasso_snr.snr[[0, 2, 4]] < 10)
+    assert np.all(s_lasso_snr.f[[0, 2, 4]] == 0)
+    assert np.allclose(s_lasso_snr.f[[1, 3]], s_lasso.f[[1, 3]], atol=1e-6)
+    assert s_lasso_snr.predict(K).shape == s.shape
+
+    s_lasso_snr = SmoothLasso(snr_threshold=1e6, **kwargs)
+    s_lasso_snr.fit(K, s)
+    assert np.all(s_lasso_snr.f == 0)
+
+    # the noise is estimated per column, such that a weak column with a low noise
+    # level is solved and a column of the same amplitude with a high noise is not.
+    weak = 0.05 * s[:, 1]
+    low = weak + np.random.normal(0, 1e-5 * s.max(), weak.size)
+    high = weak + np.random.normal(0, 1e-2 * s.max(), weak.size)
+    snr = _column_snr(np.column_stack([low, high]))
+    assert snr[0] > 10 > snr[1]
+
+
+def test_adaptive_search(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        alphas=np.geomspace(1e-2, 1e-6, 9),
+        lambdas=np.geomspace(1e-2, 1e-7, 11),
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-6,
+        max_iterations=100000,
+        folds=4,
+        pathwise=True,
+    )
+    s_lasso_cv = SmoothLassoCV(**kwargs)
+    s_lasso_cv.fit(K, s)
+    assert s_lasso_cv.n_evaluations == 99
+
+    s_lasso_adaptive = SmoothLassoCV(search="adaptive", budget=30, **kwargs)
+    s_lasso_adaptive.fit(K, s)
+    assert s_lasso_adaptive.n_evaluations <= 30
+    cv_map = s_lasso_adaptive.cross_validation_curve.dependent_variables[0]
+    cv_map = cv_map.components[0]
+    # every evaluated pair is counted once.
+    assert np.count_nonzero(~np.isnan(cv_map)) == s_lasso_adaptive.n_evaluations
+
+    # the adaptive optimum is within one step of the grid optimum.
+    for key, step in [("alpha", 0.5), ("lambda", 0.5)]:
+        grid = np.log10(s_lasso_cv.hyperparameters[key])
+        adaptive = np.log10(s_lasso_adaptive.hyperparameters[key])
+        assert abs(grid - adaptive) <= step + 1e-8
+
+    with pytest.raises(ValueError, match="is an invalid search"):
+        SmoothLassoCV(search="random", **kwargs)
+
+
+def test_warm_started_refit(problem, inverse_dimension):
+    K, s = problem
+    kwargs = dict(
+        inverse_dimension=inverse_dimension,
+        tolerance=1e-8,
+        max_iterations=100000,
+    )
+    for method, keep_solutions in [
+        ("gradient_decent", True),
+        ("sparse", True),
+        ("fista", True),
+        ("gradient_decent", False),
+        ("gram", False),
+        ("fista", False),
+    ]:
+        s_lasso_cv = SmoothLassoCV(
+            alphas=[1e-3, 1e-4],
+            lambdas=np.geomspace(1e-3, 1e-6, 4),
+            folds=4,
+            method=method,
+            keep_solutions=keep_solutions,
+            **kwargs,
+        )
+        s_lasso_cv.fit(K, s)
+        if keep_solutions:
+            assert s_lasso_cv.cv_solutions.shape == (2, 4, 1, 10, 12)
+        else:
+            # only the best mean solution of the folds is kept for the warm start.
+            assert s_lasso_cv.cv_solutions is None
+
+        hyperparameters = s_lasso_cv.hyperparameters
+        s_lasso = SmoothLasso(
+            alpha=hyperparameters["alpha"],
+            lambda1=hyperparameters["lambda"],
+            method=method,
+            **kwargs,
+        )
+        s_lasso.fit(K, s)
+        assert np.allclose(s_lasso_cv.f, s_lasso.f, atol=1e-5 * s_lasso.f.max())
+        assert s_lasso_cv.opt.n_iter <= s_lasso.n_iter
+
+
+def test_compressed_residuals(problem, inverse_dimension):
+    K, s = problem
+    s = np.stack([s, 0.5 * s, s[::-1]], axis=1)
+    compression = TSVDCompression(K, s)
+    s_lasso = SmoothLasso(alpha=1e-4, lambda1=1e-5, inverse_dimension=inverse_dimension)
+    s_lasso.fit(compression.compressed_K, compression.compressed_s)
+
+    # the residuals expanded from the compressed prediction.
+    residuals = s_lasso.residuals(compression, s)
+    norm = s_lasso.residual_norm(compression)
+    assert np.allclose(norm, np.linalg.norm(residuals, axis=0))
+
+    # the residuals of the full kernel, up to the truncation of the kernel.
+    full = s_lasso.residuals(K, s)
+    assert np.allclose(norm, np.linalg.norm(full, axis=0), rtol=1e-3)
+    assert np.allclose(s_lasso.chi_squared(compression, 1e-3), (full ** 2).sum() / 1e-6)
+    assert np.allclose(s_lasso.compressed_score(compression), s_lasso.score(K, s))
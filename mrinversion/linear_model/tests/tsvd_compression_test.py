@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import csdmpy as cp
+import numpy as np
+import pytest
+
+from mrinversion.kernel import KernelCache
+from mrinversion.kernel import KroneckerKernel
+from mrinversion.linear_model import TSVDCompression
+from mrinversion.linear_model import load_memmap
+from mrinversion.linear_model import TSVDCompressor
+from mrinversion.linear_model.linear_inversion import project_signal
+from mrinversion.linear_model.linear_inversion import reduced_subspace_kernel_and_data
+from mrinversion.linear_model.linear_inversion import TSVD
+
+np.random.seed(0)
+A = np.random.rand(12, 5)
+B = np.random.rand(10, 4)
+K = np.kron(A, B)
+
+
+def test_compressor_transform():
+    signals = [np.random.rand(120), np.random.rand(120, 3), np.random.rand(120, 2)]
+    compressor = TSVDCompressor(r=12).fit(K)
+    assert compressor.truncation_index == 12
+    assert compressor.U.shape == (120, 12)
+
+    compressed = compressor.transform(signals)
+    for s, s_tilde in zip(signals, compressed):
+        compression = TSVDCompression(K, s, r=12)
+        assert s_tilde.shape == compression.compressed_s.shape
+        assert np.allclose(s_tilde, compression.compressed_s)
+        assert np.allclose(compressor.compressed_K, compression.compressed_K)
+
+    # the compression of a csdm signal with a precomputed compressor.
+    csdm = cp.as_csdm(signals[1].T)
+    compression = TSVDCompression(None, csdm, compressor=compressor)
+    assert isinstance(compression.compressed_s, cp.CSDM)
+    assert np.allclose(
+        compression.compressed_s.dependent_variables[0].components[0], compressed[1].T
+    )
+
+
+def test_compressor_kronecker():
+    s = np.random.rand(120, 2)
+    compressor = TSVDCompressor(r=8).fit(KroneckerKernel([A, B]))
+    compressor_dense = TSVDCompressor(r=8).fit(K)
+
+    # the compressed systems are identical up to an orthogonal transformation.
+    K_tilde, K_tilde_dense = compressor.compressed_K, compressor_dense.compressed_K
+    s_tilde, s_tilde_dense = compressor.transform(s), compressor_dense.transform(s)
+    assert np.allclose(K_tilde.T @ K_tilde, K_tilde_dense.T @ K_tilde_dense)
+    assert np.allclose(K_tilde.T @ s_tilde, K_tilde_dense.T @ s_tilde_dense)
+
+
+def test_compressor_pickle_and_cache(tmp_path):
+    s = np.random.rand(120, 2)
+    compressor = TSVDCompressor().fit(K)
+
+    restored = pickle.loads(pickle.dumps(compressor))
+    assert restored.truncation_index == compressor.truncation_index
+    assert np.allclose(restored.transform(s), compressor.transform(s))
+
+    cache = KernelCache(directory=str(tmp_path))
+    cached = TSVDCompressor().fit(K, cache=cache)
+    assert len(cache) == 3
+    assert isinstance(cached.U, np.memmap)
+    assert np.allclose(cached.transform(s), compressor.transform(s))
+
+    # the decomposition is loaded from the cache.
+    loaded = TSVDCompressor().fit(K, cache=cache)
+    assert isinstance(loaded.VT, np.memmap)
+    assert np.allclose(loaded.compressed_K, compressor.compressed_K)
+
+    # a different truncation is a different entry.
+    TSVDCompressor(r=5).fit(K, cache=cache)
+    assert len(cache) == 6
+
+
+def test_partial_svd_methods():
+    t = np.linspace(0, 1, 200)
+    centers = np.linspace(0, 1, 400)
+    K_smooth = np.exp(-((t[:, np.newaxis] - centers) ** 2) / 0.002)
+    s = K_smooth @ np.random.rand(400, 2)
+
+    U, S, VT, r = TSVD(K_smooth)
+    for method in ["randomized", "lanczos"]:
+        U_, S_, VT_, r_ = TSVD(K_smooth, method=method)
+        assert abs(r_ - r) <= 1
+        assert S_.size < S.size
+        assert np.allclose(S_[:r], S[:r], rtol=0, atol=1e-10 * S[0])
+
+        compressor = TSVDCompressor(method=method).fit(K_smooth)
+        compressor_full = TSVDCompressor(r=r_).fit(K_smooth)
+        assert compressor.truncation_index == r_
+        K_tilde, K_tilde_full = compressor.compressed_K, compressor_full.compressed_K
+        s_tilde, s_tilde_full = compressor.transform(s), compressor_full.transform(s)
+        assert np.allclose(K_tilde.T @ K_tilde, K_tilde_full.T @ K_tilde_full)
+        assert np.allclose(K_tilde.T @ s_tilde, K_tilde_full.T @ s_tilde_full)
+
+    _, S_, _, r_ = TSVD(K_smooth, method="randomized", rank=5)
+    assert r_ == 5
+    assert np.allclose(S_[:5], S[:5], rtol=1e-4)
+
+    with pytest.raises(ValueError, match="is an invalid method"):
+        TSVD(K_smooth, method="qr")
+
+
+def test_partial_svd_tail():
+    # the truncation index of a low rank kernel is exact, as the singular values
+    # that are not evaluated are zero.
+    random = np.random.default_rng(0)
+    K_low = random.standard_normal((200, 30)) * np.geomspace(1, 1e-3, 30)
+    K_low = K_low @ random.standard_normal((30, 400))
+    r = TSVD(K_low)[3]
+    for method in ["randomized", "lanczos"]:
+        assert TSVD(K_low, method=method)[3] == r
+
+    # with a tail of singular values that are not negligible, the index is
+    # approximately the same as the index of the full decomposition.
+    t = np.linspace(0, 1, 200)
+    centers = np.linspace(0, 1, 400)
+    K_smooth = np.exp(-((t[:, np.newaxis] - centers) ** 2) / 0.002)
+    for seed in range(3):
+        noise = np.random.default_rng(seed).standard_normal(K_smooth.shape)
+        K_noisy = K_smooth + 1e-8 * noise
+        r = TSVD(K_noisy)[3]
+        for method in ["randomized", "lanczos"]:
+            assert abs(TSVD(K_noisy, method=method)[3] - r) <= 2
+
+
+def test_streaming_compression(tmp_path):
+    compressor = TSVDCompressor(r=10).fit(K)
+
+    # a three-dimensional dataset saved with the external raw-encoded components.
+    csdm = cp.as_csdm(np.random.rand(4, 7, 120))
+    csdm.dependent_variables[0].encoding = "raw"
+    filename = str(tmp_path / "signal.csdfe")
+    csdm.save(filename)
+
+    csdm_memmap = load_memmap(filename)
+    components = csdm_memmap.dependent_variables[0].components
+    assert not components.flags["WRITEABLE"]
+    assert np.allclose(components, csdm.dependent_variables[0].components)
+
+    compressed = compressor.transform(csdm_memmap, block_size=5)
+    expected = compressor.transform(csdm)
+    assert compressed.shape == (10, 7, 4)
+    assert compressed.dimensions[1] == csdm.dimensions[1]
+    assert np.allclose(
+        compressed.dependent_variables[0].components,
+        expected.dependent_variables[0].components,
+    )
+
+    # a numpy file of the signal matrix.
+    signal = np.random.rand(120, 9)
+    np.save(tmp_path / "signal.npy", signal)
+    signal_memmap = load_memmap(str(tmp_path / "signal.npy"))
+    assert isinstance(signal_memmap, np.memmap)
+    compression = TSVDCompression(
+        None, signal_memmap, compressor=compressor, block_size=4
+    )
+    assert np.allclose(compression.compressed_s, compressor.U.T @ signal)
+
+    # the blocks of a C-ordered three-dimensional numpy file are views of the file.
+    signal_3d = np.random.rand(120, 4, 5)
+    np.save(tmp_path / "signal_3d.npy", signal_3d)
+    memmap_3d = load_memmap(str(tmp_path / "signal_3d.npy"))
+    shared = []
+
+    def projection(block):
+        shared.append(np.shares_memory(block, memmap_3d))
+        return compressor.U.T @ block
+
+    compressed = project_signal(projection, memmap_3d, block_size=3)
+    assert all(shared) and len(shared) == 7
+    assert np.allclose(compressed, compressor.transform(signal_3d))
+    assert np.allclose(compressor.transform(memmap_3d, block_size=3), compressed)
+
+    # the by-products are evaluated on request.
+    U, S, VT = compressor.U, compressor.S, compressor.VT
+    K_tilde, s_tilde, projected, guess = reduced_subspace_kernel_and_data(
+        U, S, VT, signal, block_size=4
+    )
+    assert np.allclose(s_tilde, compression.compressed_s)
+    assert np.allclose(projected, compressor.projected_signal(s_tilde))
+    assert np.allclose(guess, compressor.guess_solution(s_tilde))
+    assert np.allclose(K_tilde @ guess, s_tilde)
+
+    result = reduced_subspace_kernel_and_data(U, S, VT, signal, by_products=False)
+    assert result[2] is None and result[3] is None
@@ -1,17 +1,222 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+
 import csdmpy as cp
+import numpy as np
 
-from mrinversion.linear_model.linear_inversion import reduced_subspace_kernel_and_data
+from mrinversion.kernel.cache import KernelCache
+from mrinversion.kernel.kronecker import KroneckerKernel
+from mrinversion.linear_model.linear_inversion import find_optimum_singular_value
+from mrinversion.linear_model.linear_inversion import project_signal
 from mrinversion.linear_model.linear_inversion import TSVD
 
 
+class TSVDCompressor:
+    r"""
+    The truncated singular value decomposition of the kernel,
+    :math:`{\bf K} \approx {\bf U}_r \text{diag}({\bf S}_r) {\bf V}_r^T`, fitted once
+    and reused to compress any number of signals against the same kernel. The
+    compressed kernel is :math:`\text{diag}({\bf S}_r) {\bf V}_r^T`, and the
+    compressed signal is :math:`{\bf U}_r^T {\bf s}`.
+
+    The fitted object holds only numpy arrays and is picklable. When fitted with a
+    :class:`~mrinversion.kernel.KernelCache`, the truncated decomposition is stored
+    in the cache, keyed by the content of the kernel and `r`, and is loaded as
+    memory-mapped arrays by every later fit with the same kernel.
+
+    Args
+    ----
+
+    r: int
+        The number of singular values retained. The default is None, that is, the
+        number is selected with the entropy criterion.
+    method: str
+        The literal specifying the singular value decomposition of a dense kernel.
+        The allowed literals are `full`, the thin singular value decomposition,
+        `randomized`, the randomized range finder, and `lanczos`, the Lanczos
+        bidiagonalization. The `randomized` and `lanczos` methods evaluate only the
+        leading singular values, in growing blocks, until the truncation index is
+        within the evaluated values, and are faster than the `full` method for
+        large kernels of low numerical rank. The truncation index is approximately
+        the same as the index of the `full` method (exact when the computed rank
+        covers the retained spectrum). The default is `full`.
+
+    Attributes
+    ----------
+
+    U: ndarray or KroneckerKernel
+        The left singular vectors, :math:`{\bf U}_r`, of shape (m, r). For a
+        KroneckerKernel, the KroneckerKernel of the left singular vectors of the
+        factors, of which the columns `index` are retained.
+    index: ndarray
+        The indexes of the retained singular values of a KroneckerKernel, else None.
+    S: ndarray
+        The retained singular values, :math:`{\bf S}_r`.
+    VT: ndarray
+        The retained right singular vectors, :math:`{\bf V}_r^T`, of shape (r, n).
+    truncation_index: int
+        The number of singular values retained.
+    compressed_K: ndarray
+        The compressed kernel.
+
+    Example
+    -------
+
+    >>> from mrinversion.linear_model import TSVDCompressor
+    >>> compressor = TSVDCompressor().fit(K, cache=cache)  # doctest: +SKIP
+    >>> s1_tilde, s2_tilde = compressor.transform([s1, s2])  # doctest: +SKIP
+    """
+
+    def __init__(self, r=None, method="full"):
+        self.r = r
+        self.method = method
+        self.U = None
+        self.S = None
+        self.VT = None
+        self.index = None
+        self.truncation_index = None
+        self.compressed_K = None
+
+    def fit(self, K, cache=None):
+        """Evaluate the truncated singular value decomposition of the kernel.
+
+        Args:
+            K: The kernel, as a ndarray or a KroneckerKernel object. The singular
+                value decomposition of a KroneckerKernel is evaluated from the
+                decompositions of the factors.
+            cache: A :class:`~mrinversion.kernel.KernelCache` object. If provided, the
+                decomposition of a dense kernel is loaded from the cache when
+                present, else it is evaluated and added to the cache.
+        """
+        if isinstance(K, KroneckerKernel):
+            U, S, VT = K.svd()
+            index = np.argsort(S)[::-1]
+            r = find_optimum_singular_value(S[index]) if self.r is None else self.r
+            self.index = index[:r]
+            return self._set(U, S[self.index], VT.rows(self.index))
+
+        if cache is not None:
+            keys = self._cache_keys(K)
+            arrays = [cache.load(key) for key in keys]
+            if all([item is not None for item in arrays]):
+                return self._set(*arrays)
+
+        U, S, VT, r = TSVD(K, self.method, rank=self.r)
+        arrays = [U[:, :r], S[:r], VT[:r, :]]
+        if cache is not None:
+            arrays = [cache.store(key, item) for key, item in zip(keys, arrays)]
+        return self._set(*arrays)
+
+    def transform(self, s, block_size=None):
+        """Return the compressed signal.
+
+        Args:
+            s: The signal, as a ndarray of shape (m, ...), a CSDM object, or a list
+                of these. The signals of a list are compressed with a single matrix
+                product and returned as a list.
+            block_size: The number of columns of the signal compressed at a time.
+                Only one block of a memory-mapped signal, see :func:`load_memmap`,
+                is read into memory at a time. The signals of a list are then
+                compressed one after the other. The default is None, that is, the
+                complete signal.
+        """
+        if block_size is not None and isinstance(s, list):
+            return [self.transform(item, block_size) for item in s]
+
+        if not isinstance(s, list):
+            compressed = project_signal(self._project, _get_signal(s), block_size)
+            return _as_compressed(s, compressed)
+
+        signals = [_get_signal(item) for item in s]
+        columns = [item.reshape(item.shape[0], -1, order="F") for item in signals]
+        sections = np.cumsum([item.shape[1] for item in columns])[:-1]
+        compressed = np.split(self._project(np.hstack(columns)), sections, axis=1)
+        return [
+            _as_compressed(item, c.reshape((-1,) + x.shape[1:], order="F"))
+            for item, c, x in zip(s, compressed, signals)
+        ]
+
+    def projected_signal(self, s_tilde):
+        """Return the projection of the signal onto the range of the retained left
+        singular vectors, :math:`{\\bf U}_r {\\bf U}_r^T {\\bf s}`, from the
+        compressed signal.
+
+        Args:
+            s_tilde: A ndarray of shape (r, ...), the compressed signal.
+        """
+        s_tilde = np.asarray(s_tilde)
+        if self.index is None:
+            return np.tensordot(self.U, s_tilde, axes=(1, 0))
+
+        coefficients = np.zeros((self.U.shape[1],) + s_tilde.shape[1:], s_tilde.dtype)
+        coefficients[self.index] = s_tilde
+        return self.U.matvec(coefficients)
+
+    def guess_solution(self, s_tilde):
+        """Return the unregularized least-squares solution of the compressed problem,
+        :math:`{\\bf V}_r \\text{diag}({\\bf S}_r)^{-1} \\tilde{\\bf s}`.
+
+        Args:
+            s_tilde: A ndarray of shape (r, ...), the compressed signal.
+        """
+        return np.tensordot(self.VT.T / self.S, np.asarray(s_tilde), axes=(1, 0))
+
+    def _compress(self, s, block_size=None):
+        """Return the compressed signal, of shape (r, ...), along with the sum of
+        squares and the sum of every column of the signal, evaluated in a single pass
+        over the signal."""
+
+        def projection(block):
+            sum_of_squares = (np.abs(block) ** 2).sum(axis=0)
+            return np.vstack([self._project(block), sum_of_squares, block.sum(axis=0)])
+
+        out = project_signal(projection, _get_signal(s), block_size)
+        return out[:-2], out[-2].real, out[-1]
+
+    def _project(self, signal):
+        """Return the product of the transpose of the retained left singular vectors
+        and the signal, of shape (r, m_count)."""
+        if self.index is None:
+            return np.asfortranarray(self.U.T @ signal)
+        return np.asfortranarray(self.U.rmatvec(signal)[self.index])
+
+    def _set(self, U, S, VT):
+        """Set the truncated decomposition and the compressed kernel."""
+        self.U, self.S, self.VT = U, S, VT
+        self.truncation_index = S.size
+        self.compressed_K = np.asfortranarray(S[:, np.newaxis] * VT)
+        return self
+
+    def _cache_keys(self, K):
+        """Return the cache keys of U, S, and VT of the kernel."""
+        K = np.ascontiguousarray(K, dtype=np.float64)
+        digest = hashlib.sha256(K.tobytes()).hexdigest()
+        return [
+            KernelCache.key("tsvd", digest, K.shape, self.r, self.method, i)
+            for i in range(3)
+        ]
+
+
 class TSVDCompression:
-    """SVD compression.
+    r"""SVD compression.
 
     Args:
-        K: The kernel.
+        K: The kernel, as a ndarray or a KroneckerKernel object. The singular value
+            decomposition of a KroneckerKernel is evaluated from the decompositions
+            of the factors.
         s: The data.
         r: The number of singular values used in data compression.
+        compressor: A fitted TSVDCompressor object. If provided, the decomposition
+            of the compressor is used, and the arguments `K`, `r`, and `method` are
+            ignored.
+        method: The literal specifying the singular value decomposition. The allowed
+            literals are `full`, `randomized`, and `lanczos`. See the
+            TSVDCompressor class. The default is `full`.
+        block_size: The number of columns of the signal compressed at a time, for
+            the compression of a memory-mapped signal with a bounded memory. See the
+            :func:`load_memmap` function. The default is None.
 
     Attributes
     ----------
@@ -24,31 +229,102 @@ class TSVDCompression:
 
     compressed_s: ndarray of CSDM object
         The compressed data.
+
+    compressor: TSVDCompressor
+        The fitted compressor, reusable for other signals of the same kernel.
+
+    out_of_subspace_norm: ndarray
+        The norm of the part of the signal outside the range of the retained left
+        singular vectors, :math:`\|{\bf s} - {\bf U}_r {\bf U}_r^T {\bf s}\|_2`,
+        of every column of the signal.
+
+    total_sum_of_squares: ndarray
+        The sum of squares of every column of the signal about its mean.
+
+    The residual norm, :math:`\chi^2`, and :math:`R^2` of a linear model fitted to
+    the compressed problem follow from the compressed residual and the above
+    attributes, without the signal. See the
+    :meth:`~mrinversion.linear_model.SmoothLasso.residual_norm` method.
     """
 
-    def __init__(self, K, s, r=None):
-
-        U, S, VT, r_ = TSVD(K)
-        if r is None:
-            r = r_
-        self.truncation_index = r
-
-        if isinstance(s, cp.CSDM):
-            signal = s.dependent_variables[0].components[0].T
-        else:
-            signal = s
-        (
-            self.compressed_K,
-            compressed_signal,
-            _,  # projectedSignal,
-            __,  # guess_solution,
-        ) = reduced_subspace_kernel_and_data(U[:, :r], S[:r], VT[:r, :], signal)
-        factor = signal.size / compressed_signal.size
+    def __init__(self, K, s, r=None, compressor=None, method="full", block_size=None):
+        if compressor is None:
+            compressor = TSVDCompressor(r, method).fit(K)
+
+        self.compressor = compressor
+        self.compressed_K = compressor.compressed_K
+        self.truncation_index = compressor.truncation_index
+
+        # the sums of squares of the signal are accumulated with the projection.
+        compressed, sum_of_squares, sums = compressor._compress(s, block_size)
+        self.compressed_s = _as_compressed(s, compressed)
+
+        m = _get_signal(s).shape[0]
+        inside = (np.abs(compressed) ** 2).sum(axis=0)
+        self.out_of_subspace_norm = np.sqrt(np.maximum(sum_of_squares - inside, 0.0))
+        self.total_sum_of_squares = sum_of_squares - np.abs(sums) ** 2 / m
+
+        factor = m / compressor.truncation_index
         print(f"compression factor = {factor}")
 
-        if isinstance(s, cp.CSDM):
-            self.compressed_s = cp.as_csdm(compressed_signal.T)
-            if len(s.dimensions) > 1:
-                self.compressed_s.dimensions[1] = s.dimensions[1]
-        else:
-            self.compressed_s = compressed_signal
+
+def load_memmap(filename):
+    """Return the signal of a file as a read-only memory-mapped array, which is read
+    from the disk only when used.
+
+    Args:
+        filename: The path to a `.npy` file of the signal, of shape (m, ...), or
+            to a `.csdfe` file with the `external` dependent variable, that is, a
+            CSDM object saved with the `raw` encoding.
+
+    Returns:
+        A numpy memmap object for a `.npy` file, and a CSDM object backed by the
+        memory-mapped first component of the first dependent variable for a
+        `.csdfe` file.
+    """
+    if str(filename).endswith(".npy"):
+        return np.load(filename, mmap_mode="r")
+
+    with open(filename, "r") as f:
+        csdm = json.load(f)["csdm"]
+    variable = csdm["dependent_variables"][0]
+    if variable["type"] != "external":
+        raise ValueError(
+            "The memory mapping requires a `.csdfe` file with the `external` "
+            "dependent variable."
+        )
+
+    dimensions = [cp.Dimension(**item) for item in csdm["dimensions"]]
+    url = variable["components_url"]
+    if url.startswith("file:"):
+        url = os.path.join(os.path.dirname(os.path.abspath(filename)), url[5:])
+
+    # the components of the dependent variable are stored one after the other, in the
+    # C-order of the reversed dimensions.
+    shape = tuple([item.count for item in dimensions])[::-1]
+    dtype = np.dtype(variable["numeric_type"]).newbyteorder("<")
+    components = np.memmap(url, dtype=dtype, mode="r", shape=shape)
+
+    keys = ["name", "unit", "quantity_name"]
+    kwargs = {key: variable[key] for key in keys if key in variable}
+    dependent_variable = cp.as_dependent_variable(components, **kwargs)
+    return cp.CSDM(dimensions=dimensions, dependent_variables=[dependent_variable])
+
+
+def _get_signal(s):
+    """Return the signal as a ndarray of shape (m, ...)."""
+    if isinstance(s, cp.CSDM):
+        return s.dependent_variables[0].components[0].T
+    return np.asarray(s)
+
+
+def _as_compressed(s, compressed_signal):
+    """Return the compressed signal, of shape (r, ...), in the form of the signal,
+    s."""
+    if not isinstance(s, cp.CSDM):
+        return compressed_signal
+
+    compressed_s = cp.as_csdm(compressed_signal.T)
+    for i, dimension in enumerate(s.dimensions[1:]):
+        compressed_s.dimensions[i + 1] = dimension
+    return compressed_s